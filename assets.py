@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+
+def solid_surface(size, color):
+    """A plain surface filled with color, used when an image can't be loaded"""
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+
+def load_scaled_image(path, size, cache_dir=None):
+    """Load path scaled to size, reusing a pre-scaled copy from cache_dir when it is current"""
+    cache_path = None
+    if cache_dir:
+        # The source's mtime is part of the name, so an edited image is decoded again
+        prefix = f"{os.path.basename(path)}-{size[0]}x{size[1]}-"
+        cache_path = os.path.join(cache_dir, f"{prefix}{os.stat(path).st_mtime_ns:x}.bmp")
+        try:
+            return pygame.image.load(cache_path)
+        except (OSError, pygame.error):
+            pass
+
+    surface = pygame.transform.scale(pygame.image.load(path), size)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            for name in os.listdir(cache_dir):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(cache_dir, name))
+            temp_path = cache_path + '.tmp.bmp'
+            pygame.image.save(surface, temp_path)
+            os.replace(temp_path, cache_path)
+        except (OSError, pygame.error):
+            pass  # the cache is only a shortcut
+    return surface
+
+
+class AssetManager:
+    """Game images and fonts, with surfaces converted to the display format once
+
+    add() registers a loader and a fallback under a name. Assets the menu
+    needs are loaded at once; background ones are decoded on a worker
+    thread and the first lookup waits for them. Surfaces are converted on
+    the main thread when they enter the cache, so later blits skip the
+    per-blit pixel-format conversion. load_times records each load.
+    """
+
+    def __init__(self):
+        self.assets = {}
+        self.pending = {}
+        self.load_times = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='assets')
+
+    def add(self, name, loader, fallback, background=False):
+        """Load an asset now, or queue it for the worker thread if background"""
+        if background:
+            self.pending[name] = self.executor.submit(self.load, name, loader, fallback)
+        else:
+            self[name] = self.load(name, loader, fallback)
+
+    def load(self, name, loader, fallback):
+        """Run loader, or fallback if the file is missing or unreadable"""
+        start = time.perf_counter()
+        try:
+            asset = loader()
+        except (OSError, pygame.error):
+            asset = fallback()
+        self.load_times[name] = time.perf_counter() - start
+        return asset
+
+    def __setitem__(self, name, asset):
+        if isinstance(asset, pygame.Surface):
+            has_alpha = asset.get_flags() & pygame.SRCALPHA
+            asset = asset.convert_alpha() if has_alpha else asset.convert()
+        self.assets[name] = asset
+
+    def __getitem__(self, name):
+        if name in self.pending:
+            self[name] = self.pending.pop(name).result()
+        return self.assets[name]
+
+    def __contains__(self, name):
+        return name in self.assets or name in self.pending
+
+    def wait(self):
+        """Finish every background load"""
+        for name in list(self.pending):
+            self[name] = self.pending.pop(name).result()
+
+    def close(self):
+        """Stop the worker thread"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
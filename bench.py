@@ -0,0 +1,405 @@
+"""Headless benchmark suite for MemoMaze
+
+Runs seeded mazes and scripted camera paths through the real game code
+under SDL's dummy video driver, reports per-function timings and frame
+time percentiles, writes them to JSON and compares against a baseline.
+
+    python bench.py                    # run and compare to bench_baseline.json
+    python bench.py --save-baseline    # run and store the result as the baseline
+    python bench.py --quick            # fewer frames, difficulties only (not comparable to a full run)
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from constants import CORRIDOR_JUMPS, DIFFICULTY_SETTINGS, FOV, SCREEN_WIDTH
+from maze import ALGORITHMS, generate_maze
+
+SEED = 1234
+SCALED_SIZES = [51, 101, 201]
+GENERATION_SIZES = [21, 201, 501]
+WORKER_COUNTS = [1, 2, 4, 8]
+DEFAULT_BASELINE = 'bench_baseline.json'
+DEFAULT_OUTPUT = 'bench_results.json'
+REGRESSION_THRESHOLD = 0.15  # flag metrics more than 15% slower than the baseline
+MIN_REGRESSION_MS = 0.25  # ...and slower by at least this much, to ignore timer noise
+# meta entries that change what a case measures; runs only compare when they all match
+RUN_SETTINGS = ('quick', 'frames', 'repeats', 'seed')
+
+
+def summarize(samples):
+    """Mean and percentiles of a list of durations, in milliseconds"""
+    ms = np.array(samples) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+def timed(func, *args):
+    """Run func once and return its duration in seconds"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def camera_path(grid, frames):
+    """Scripted poses along the shortest route from the entrance to the exit
+
+    The camera walks cell centre to cell centre facing the next cell and
+    sweeps its view a little, so each frame sees corridors, junctions and
+    finally the exit wall.
+    """
+    height, width = grid.shape
+    start, goal = (1, 1), (width - 2, height - 2)
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if cell == goal:
+            break
+        x, y = cell
+        for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if nxt not in previous and grid[nxt[1], nxt[0]] == 0:
+                previous[nxt] = cell
+                queue.append(nxt)
+
+    route = [goal]
+    while previous.get(route[-1]) is not None:
+        route.append(previous[route[-1]])
+    route.reverse()
+
+    poses = []
+    for i in range(frames):
+        t = i / max(1, frames - 1) * (len(route) - 1)
+        index = min(int(t), len(route) - 2) if len(route) > 1 else 0
+        (ax, ay), (bx, by) = route[index], route[min(index + 1, len(route) - 1)]
+        frac = t - index
+        x = ax + 0.5 + (bx - ax) * frac
+        y = ay + 0.5 + (by - ay) * frac
+        angle = math.atan2(by - ay, bx - ax) + 0.4 * math.sin(i * 0.1)
+        poses.append(([x, y], angle))
+    return poses
+
+
+def bench_maze(game, grid, frames, renderers):
+    """Time the per-frame functions along a camera path through one maze"""
+    results = {}
+    poses = camera_path(grid, frames)
+    game.top_view_cache = None
+    game.minimap = None
+
+    for renderer in renderers:
+        game.renderer = renderer
+        # Warm up one frame so one-off cache builds don't land in the samples
+        game.render_frame(poses[0][0], poses[0][1], grid)
+        game.draw_minimap(grid, poses[0][0], poses[0][1])
+        render, frame = [], []
+        for pos, angle in poses:
+            start = time.perf_counter()
+            game.render_frame(pos, angle, grid)
+            middle = time.perf_counter()
+            game.draw_minimap(grid, pos, angle)
+            pygame.display.flip()
+            end = time.perf_counter()
+            render.append(middle - start)
+            frame.append(end - start)
+        results[f'render_frame[{renderer}]'] = summarize(render)
+        stats = summarize(frame)
+        stats['fps'] = 1000 / stats['mean_ms']
+        results[f'frame[{renderer}]'] = stats
+
+    # A single python-path ray per column, sampled across the view
+    rows = grid.tolist()
+    samples = []
+    for pos, angle in poses[::max(1, len(poses) // 20)]:
+        for x in range(0, SCREEN_WIDTH, 40):
+            ray_angle = (angle - FOV / 2) + (x / SCREEN_WIDTH) * FOV
+            samples.append(timed(game.cast_ray, x, ray_angle, pos, rows))
+    results['cast_ray'] = summarize(samples)
+
+    results['draw_minimap'] = summarize([timed(game.draw_minimap, grid, pos, angle)
+                                         for pos, angle in poses])
+    game.top_view_cache = None
+    first = timed(game.draw_top_view, grid, 1, [1.5, 1.5], 0)
+    results['draw_top_view'] = summarize([timed(game.draw_top_view, grid, 1, pos, angle)
+                                             for pos, angle in poses])
+    results['draw_top_view']['first_ms'] = first * 1000
+    return results
+
+
+def bench_workers(game, grid, frames, worker_counts):
+    """Time the NumPy renderer with its column bands drawn on each number of threads
+
+    Each entry also records speedup, its mean frame time relative to one
+    worker; the thread count only helps up to the machine's core count.
+    """
+    from raycaster import VectorRaycaster
+
+    results = {}
+    poses = camera_path(grid, frames)
+    game.render_frame(poses[0][0], poses[0][1], grid)  # builds the atlas and texture ids
+    for workers in worker_counts:
+        raycaster = VectorRaycaster(game.assets['sky'], game.atlas, floor_texture=game.floor_texture(),
+                                    workers=workers)
+        raycaster.render(game.screen, poses[0][0], poses[0][1], grid, game.texture_ids)
+        samples = [timed(raycaster.render, game.screen, pos, angle, grid, game.texture_ids)
+                   for pos, angle in poses]
+        raycaster.close()
+        results[f'render[{workers} workers]'] = summarize(samples)
+    single = results[f'render[{worker_counts[0]} workers]']['mean_ms']
+    for stats in results.values():
+        stats['speedup'] = single / stats['mean_ms']
+    return results
+
+
+def bench_corridors(game, grid, frames, renderers):
+    """Time frames with and without corridor jumps; steps and saved are mean DDA steps per frame"""
+    results = {}
+    poses = camera_path(grid, frames)
+    try:
+        for jumps in (False, True):
+            game.corridor_jumps = jumps
+            game.grid_source = None  # rebuild the maze tables
+            label = 'jumps' if jumps else 'cells'
+            for renderer in renderers:
+                game.renderer = renderer
+                game.render_frame(poses[0][0], poses[0][1], grid)
+                steps = saved = 0
+                samples = []
+                for pos, angle in poses:
+                    samples.append(timed(game.render_frame, pos, angle, grid))
+                    hits = game.raycaster.last_hits
+                    if renderer == 'numpy':
+                        steps += hits.steps
+                        saved += hits.saved
+                stats = summarize(samples)
+                if renderer == 'numpy':
+                    stats['steps'] = steps / len(poses)
+                    stats['saved'] = saved / len(poses)
+                results[f'render_frame[{renderer},{label}]'] = stats
+    finally:
+        game.corridor_jumps = CORRIDOR_JUMPS
+        game.grid_source = None
+    return results
+
+
+def bench_endless(game, frames, depth=100000):
+    """Time endless-mode frames deep in the maze, where every cell read goes through the chunk cache"""
+    from constants import ENDLESS_CHUNK_ROWS, ENDLESS_MAX_CHUNKS
+    from endless import EndlessMaze
+
+    width = DIFFICULTY_SETTINGS['Endless']['maze_size']
+    maze = EndlessMaze(width, SEED, ENDLESS_CHUNK_ROWS, ENDLESS_MAX_CHUNKS)
+    # The camera path is planned on a copy of a few chunks, then replayed that deep
+    top = depth * maze.chunk_height
+    grid = maze.region(top, 4 * maze.chunk_height - 1)
+    grid[[0, -1]] = 1  # close the passages out of the copy, which camera_path can't follow
+    poses = [([x, y + top], angle) for (x, y), angle in camera_path(grid, frames)]
+
+    results = {}
+    game.top_view_cache = None
+    game.minimap = None
+    for renderer in ('numpy', 'python'):
+        game.renderer = renderer
+        game.render_frame(poses[0][0], poses[0][1], maze)
+        results[f'render_frame[{renderer}]'] = summarize([timed(game.render_frame, pos, angle, maze)
+                                                         for pos, angle in poses])
+    results['draw_minimap'] = summarize([timed(game.draw_minimap, maze, pos, angle) for pos, angle in poses])
+    results['chunk'] = summarize([timed(maze.chunk, depth + i) for i in range(2 * ENDLESS_MAX_CHUNKS)])
+    return results
+
+
+def bench_generation(sizes, repeats):
+    """Time every maze algorithm at each size, and the exit distance field built per maze"""
+    from pathfield import ExitField
+
+    results = {}
+    for algorithm in ALGORITHMS:
+        for size in sizes:
+            samples = [timed(generate_maze, size, size, SEED + i, algorithm) for i in range(repeats)]
+            results[f'generate_maze[{algorithm}]@{size}'] = summarize(samples)
+    for size in sizes:
+        grid = generate_maze(size, size, SEED)
+        results[f'ExitField@{size}'] = summarize([timed(ExitField, grid) for _ in range(repeats)])
+    return results
+
+
+def bench_startup(repeats):
+    """Time Game() with a cold and a warm asset cache, and blits of converted assets"""
+    from main import Game
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ('cold', 'warm'):
+            samples, asset_samples = [], []
+            for i in range(repeats):
+                if label == 'cold':
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                start = time.perf_counter()
+                game = Game(maze_pool_size=0, asset_cache_dir=cache_dir)
+                game.assets.wait()
+                samples.append(time.perf_counter() - start)
+                asset_samples.append(sum(game.assets.load_times.values()))
+                game.close()
+            results[f'Game()[{label}]'] = summarize(samples)
+            results[f'load_assets[{label}]'] = summarize(asset_samples)
+
+    # The same image as loaded before assets were converted to the display format
+    screen = pygame.display.get_surface()
+    raw = pygame.transform.scale(pygame.image.load('maze_bg.png'), screen.get_size())
+    converted = game.assets['background']
+    results['blit[background]'] = summarize([timed(screen.blit, converted, (0, 0)) for _ in range(200)])
+    results['blit[background,unconverted]'] = summarize([timed(screen.blit, raw, (0, 0)) for _ in range(200)])
+    return results
+
+
+def run(frames, quick):
+    from main import Game
+
+    repeats = {'startup': 3, 'generation': 1} if quick else {'startup': 10, 'generation': 3}
+    print('  startup...', flush=True)
+    startup = bench_startup(repeats['startup'])
+    game = Game(maze_pool_size=0)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+            'frames': frames,
+            'repeats': repeats,
+            'seed': SEED,
+        },
+        'cases': {'startup': startup},
+    }
+
+    cases = [(name, settings['maze_size'], ['numpy', 'python'])
+             for name, settings in DIFFICULTY_SETTINGS.items() if not settings.get('endless')]
+    if not quick:
+        cases += [(f'size{size}', size, ['numpy']) for size in SCALED_SIZES]
+
+    for name, size, renderers in cases:
+        print(f'  {name} ({size}x{size})...', flush=True)
+        grid = generate_maze(size, size, SEED)
+        report['cases'][name] = bench_maze(game, grid, frames, renderers)
+
+    print('  corridor jumps...', flush=True)
+    size = SCALED_SIZES[0] if quick else SCALED_SIZES[-1]
+    grid = generate_maze(size, size, SEED)
+    report['cases'][f'corridors@{size}'] = bench_corridors(game, grid, frames, ['numpy', 'python'])
+
+    print('  endless...', flush=True)
+    report['cases']['endless'] = bench_endless(game, frames)
+
+    print('  render workers...', flush=True)
+    size = max(settings['maze_size'] for settings in DIFFICULTY_SETTINGS.values())
+    grid = generate_maze(size, size, SEED)
+    report['cases']['workers'] = bench_workers(game, grid, frames, WORKER_COUNTS[:2] if quick else WORKER_COUNTS)
+
+    print('  maze generation...', flush=True)
+    sizes = GENERATION_SIZES[:2] if quick else GENERATION_SIZES
+    report['cases']['generation'] = bench_generation(sizes, repeats['generation'])
+    return report
+
+
+def mismatched_settings(report, baseline):
+    """RUN_SETTINGS that differ between the report and the baseline, as {name: (baseline, report)}"""
+    meta, old = report['meta'], baseline.get('meta', {})
+    return {name: (old.get(name), meta.get(name)) for name in RUN_SETTINGS if old.get(name) != meta.get(name)}
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Return (case, metric, baseline_ms, current_ms) for every p50 regression"""
+    regressions = []
+    for case, metrics in report['cases'].items():
+        for metric, stats in metrics.items():
+            old = baseline.get('cases', {}).get(case, {}).get(metric)
+            if (old and stats['p50_ms'] > old['p50_ms'] * (1 + threshold) and
+                    stats['p50_ms'] - old['p50_ms'] >= MIN_REGRESSION_MS):
+                regressions.append((case, metric, old['p50_ms'], stats['p50_ms']))
+    return regressions
+
+
+def print_report(report):
+    for case, metrics in report['cases'].items():
+        print(f'\n{case}')
+        for metric, stats in metrics.items():
+            fps = f"  {stats['fps']:7.1f} fps" if 'fps' in stats else ''
+            if 'speedup' in stats:
+                fps = f"  {stats['speedup']:7.2f}x"
+            if 'saved' in stats:
+                fps = f"  {stats['steps']:7.0f} steps  {stats['saved']:6.0f} saved"
+            print(f"  {metric:34} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms"
+                  f"  p99 {stats['p99_ms']:8.3f} ms{fps}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=240, help='frames per camera path')
+    parser.add_argument('--quick', action='store_true', help='difficulties only, fewer frames')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='where to write the JSON results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='allowed p50 slowdown before a metric counts as a regression')
+    args = parser.parse_args(argv)
+
+    frames = min(args.frames, 60) if args.quick else args.frames
+    print('Running benchmarks...')
+    report = run(frames, args.quick)
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults written to {args.output}')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print(f'No baseline at {args.baseline}; run with --save-baseline to create one')
+        return 0
+
+    mismatched = mismatched_settings(report, baseline)
+    if mismatched:
+        # e.g. a --quick run against a full baseline: the same names measure different work
+        details = ', '.join(f'{name} {old} vs {new}' for name, (old, new) in mismatched.items())
+        print(f'Not comparing: {args.baseline} was recorded with other settings ({details}); '
+              f'rerun with its settings or save a new baseline')
+        return 2
+
+    regressions = compare(report, baseline, args.threshold)
+    for case, metric, old, new in regressions:
+        print(f'REGRESSION {case} {metric}: p50 {old:.3f} ms -> {new:.3f} ms')
+    if not regressions:
+        print('No regressions against the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
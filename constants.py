@@ -0,0 +1,120 @@
+import math
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+CELL_SIZE = 20
+PLAYER_SPEED = 0.05  # Reduced for better control
+ROTATION_SPEED = 0.03  # Reduced for smoother rotation
+EPSILON = 1e-10
+TEXTURE_SIZE = 64
+FOV = math.pi / 3 # 60 - degree field of view
+
+# Wall colours used by the first-person view
+WALL_COLOR = (139, 69, 19)
+FLOOR_COLOR = (173, 208, 179)
+SIDE_SHADE = 0.7  # Darkening applied to walls hit on a y-side
+HINT_COLOR = (255, 215, 0)  # Exit hint arrow and the route drawn on the map
+
+# Renderer used for the first-person view: 'numpy' casts every column in one
+# batched pass, 'python' is the original per-column cast_ray loop
+RENDERER = 'numpy'
+
+# Texture the floor (see raycaster.FloorCaster) instead of filling it with FLOOR_COLOR
+FLOOR_TEXTURE = True
+
+# Distance fog on the walls: FOG_LEVELS shades fading towards FOG_COLOR out to
+# FOG_DISTANCE cells (1 level turns fog off)
+FOG_LEVELS = 1
+FOG_COLOR = (200, 215, 225)
+FOG_DISTANCE = 12.0
+
+# Dynamic resolution for the 'numpy' renderer: when frames take longer than
+# TARGET_FRAME_MS the view is rendered at a lower internal resolution and
+# upscaled, never below MIN_RENDER_SCALE of the screen size
+DYNAMIC_RESOLUTION = False
+TARGET_FRAME_MS = 1000 / 60
+MIN_RENDER_SCALE = 0.5
+
+# Corridor jumps: both renderers read walls from per-maze tables of the open cells
+# ahead of every cell in each direction (corridors.corridor_runs) and cross straight
+# stretches of a corridor in one DDA step; the HUD's dda_saved counts the steps spared.
+# Off by default: the jumps spare steps but not time on the bench
+CORRIDOR_JUMPS = False
+
+# Threads drawing the 'numpy' renderer's column bands in parallel (1 draws the
+# whole frame on the game thread); more than the machine's cores only adds overhead
+RENDER_WORKERS = 1
+
+# Fixed-timestep simulation: PLAYER_SPEED and ROTATION_SPEED apply once per tick
+# whatever the frame rate; the renderer is capped at RENDER_FPS and can blend the
+# last two ticks' poses. Frames slower than MAX_FRAME_TIME seconds are clamped
+SIM_TICK_RATE = 60
+RENDER_FPS = 60
+INTERPOLATE_POSE = True
+MAX_FRAME_TIME = 0.25
+
+# Idle mode: after IDLE_AFTER_FRAMES frames without a change to the view the
+# first-person loop stops redrawing and waits for input, waking at IDLE_FPS
+IDLE_AFTER_FRAMES = 30
+IDLE_FPS = 10
+
+# Seconds the top-down map stays up after pressing M
+MAP_VIEW_TIME = 2
+
+# Optional frame profiler log written while the F3 HUD is on: a .csv path
+# gets one row per stage and counter, a .json path a Chrome trace
+PROFILE_LOG = None
+
+# Maze generator used by start_game: 'dfs', 'kruskal', 'wilson' or 'binary_tree'
+MAZE_ALGORITHM = 'dfs'
+
+# Background maze pool: mazes kept ready per difficulty (0 disables the pool),
+# worker processes refilling it and the file it persists to between runs
+MAZE_POOL_SIZE = 3
+MAZE_POOL_WORKERS = 2
+MAZE_POOL_CACHE = 'maze_pool.npz'
+
+# Directory of pre-scaled image copies, so later launches skip decoding and scaling
+ASSET_CACHE_DIR = '.asset_cache'
+
+# Leaderboard database; scores from the old high_scores.json are imported once
+LEADERBOARD_PATH = 'leaderboard.db'
+LEGACY_HIGH_SCORES = 'high_scores.json'
+
+# Directory finished runs are recorded to for replay.py to verify (None disables recording)
+REPLAY_DIR = 'replays'
+
+# Game settings for different difficulties
+DIFFICULTY_SETTINGS = {
+    'Easy': {
+        'maze_size': 11,
+        'initial_view_time': 8,
+        'top_view_allowed': 2,
+        'score_multiplier': 1
+    },
+    'Medium': {
+        'maze_size': 15,
+        'initial_view_time': 6,
+        'top_view_allowed': 2,
+        'score_multiplier': 2
+    },
+    'Hard': {
+        'maze_size': 21,
+        'initial_view_time': 4,
+        'top_view_allowed': 2,
+        'score_multiplier': 3
+    },
+    # No exit: the maze is maze_size wide and streamed in chunks as the player heads down
+    'Endless': {
+        'maze_size': 21,
+        'initial_view_time': 4,
+        'top_view_allowed': 2,
+        'score_multiplier': 1,
+        'endless': True
+    }
+}
+
+# Endless mode: cell rows per streamed chunk and chunks kept in memory
+ENDLESS_CHUNK_ROWS = 16
+ENDLESS_MAX_CHUNKS = 6
@@ -0,0 +1,40 @@
+import numpy as np
+
+from maze import WALL
+from pathfield import STEPS
+
+MAX_RUN = 255  # Longest run stored per cell; a ray in a longer corridor jumps again
+
+
+def runs_east(walls):
+    """Open cells east of every cell before the next wall or the edge of the grid"""
+    height, width = walls.shape
+    columns = np.arange(width)
+    wall_at = np.where(walls, columns, width)
+    # Column of the nearest wall at or after each cell, then shifted to start one cell further on
+    nearest = np.minimum.accumulate(wall_at[:, ::-1], axis=1)[:, ::-1]
+    ahead = np.full((height, width), width, dtype=np.int64)
+    ahead[:, :-1] = nearest[:, 1:]
+    return ahead - columns - 1
+
+
+def corridor_runs(grid):
+    """Open cells ahead of every cell in each STEPS direction, indexed [direction, y, x]
+
+    Built once per maze so a ray can take every step of a straight run of
+    open cells at once instead of testing them one by one. Runs stop at the
+    edge of the grid and are capped at MAX_RUN.
+    """
+    walls = np.asarray(grid, dtype=np.uint8) == WALL
+    runs = np.empty((len(STEPS),) + walls.shape, dtype=np.uint8)
+    # Each direction is the eastward run of a flipped or transposed view
+    views = {
+        (1, 0): lambda a: a,
+        (-1, 0): lambda a: a[:, ::-1],
+        (0, 1): lambda a: a.T,
+        (0, -1): lambda a: a[::-1].T,
+    }
+    for code, step in enumerate(STEPS):
+        view = views[step]
+        view(runs[code])[...] = np.minimum(runs_east(view(walls)), MAX_RUN)
+    return runs
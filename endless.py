@@ -0,0 +1,155 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from maze import PATH, WALL
+from textures import WALL_TEXTURE
+
+JOIN_CHANCE = 0.5  # Chance that neighbouring cells in different sets are joined
+DOWN_CHANCE = 0.35  # Chance that a cell opens into the row below, besides the one each set needs
+ENDLESS_HEIGHT = 2 ** 31 - 1  # Rows reported by EndlessMaze.shape; far more than anyone walks
+
+
+def eller_rows(cols, rows, rng):
+    """Yield a maze band cols cells wide one cell row at a time (Eller's algorithm)
+
+    Only the set labels of the current row are kept. Each step yields the
+    grid row of the cells with their east-west passages and the wall row
+    below it with the passages down; the last row joins every remaining
+    set and yields None below, so the band is a perfect maze on its own.
+    """
+    width = 2 * cols + 1
+    sets = list(range(cols))
+    next_set = cols
+    for row in range(rows):
+        last = row == rows - 1
+        cells = [WALL] * width
+        cells[1:width - 1:2] = [PATH] * cols
+        for x in range(cols - 1):
+            if sets[x] != sets[x + 1] and (last or rng.random() < JOIN_CHANCE):
+                cells[2 * x + 2] = PATH
+                merged = sets[x + 1]
+                sets = [sets[x] if s == merged else s for s in sets]
+        if last:
+            yield cells, None
+            return
+
+        # Every set carries on down at least once, so no region is closed off
+        down = (rng.random(cols) < DOWN_CHANCE).tolist()
+        members = {}
+        for x, s in enumerate(sets):
+            members.setdefault(s, []).append(x)
+        for xs in members.values():
+            if not any(down[x] for x in xs):
+                down[xs[rng.integers(len(xs))]] = True
+
+        below = [WALL] * width
+        for x in range(cols):
+            if down[x]:
+                below[2 * x + 1] = PATH
+            else:
+                sets[x] = next_set
+                next_set += 1
+        yield cells, below
+
+
+def build_chunk(seed, index, cols, rows):
+    """Grid rows of chunk index: a wall row, then rows cell rows of Eller's maze
+
+    The chunk is rebuilt identically from (seed, index). Its top wall row
+    has one passage up into the previous chunk, so chunks joined one under
+    another form a single perfect maze.
+    """
+    rng = np.random.default_rng([seed, index])
+    grid = np.full((2 * rows, 2 * cols + 1), WALL, dtype=np.uint8)
+    if index > 0:
+        grid[0, 2 * rng.integers(cols) + 1] = PATH
+    for row, (cells, below) in enumerate(eller_rows(cols, rows, rng)):
+        grid[2 * row + 1] = cells
+        if below is not None:
+            grid[2 * row + 2] = below
+    return grid
+
+
+class EndlessMaze:
+    """Maze of unbounded depth, generated in chunks as it is read
+
+    The maze is width cells wide and runs down forever from the entrance
+    at the top. Chunks of chunk_rows cell rows are built on first access
+    and kept in an LRU window of max_chunks; an evicted chunk is simply
+    rebuilt from the seed, so memory stays flat however far the player
+    goes. Supports the access patterns of the fixed grids: maze[y][x],
+    len(maze), .shape and array indexing maze[ys, xs].
+    """
+
+    def __init__(self, width, seed, chunk_rows=16, max_chunks=6):
+        self.cols = width // 2
+        self.width = 2 * self.cols + 1
+        self.height = ENDLESS_HEIGHT
+        self.shape = (self.height, self.width)
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.chunk_height = 2 * chunk_rows
+        self.max_chunks = max(2, max_chunks)
+        self.chunks = OrderedDict()
+        self.built = 0
+        # The chunk read last, for the cell-by-cell lookups of cast_ray and collision checks
+        self.last_index = None
+        self.last_rows = None
+
+    def chunk(self, index):
+        """(grid, rows) of a chunk, building it and evicting the least recently used if needed"""
+        chunk = self.chunks.get(index)
+        if chunk is not None:
+            self.chunks.move_to_end(index)
+            return chunk
+        grid = build_chunk(self.seed, index, self.cols, self.chunk_rows)
+        chunk = self.chunks[index] = (grid, grid.tolist())
+        self.built += 1
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.cells(*key)
+        if not 0 <= key < self.height:
+            raise IndexError('maze row out of range')
+        index, row = divmod(key, self.chunk_height)
+        if index != self.last_index:
+            self.last_rows = self.chunk(index)[1]
+            self.last_index = index
+        return self.last_rows[row]
+
+    def cells(self, ys, xs):
+        """Cell values at arrays of coordinates, one gather per chunk they touch"""
+        ys = np.asarray(ys, dtype=np.int64)
+        xs = np.asarray(xs, dtype=np.int64)
+        values = np.full(np.broadcast(ys, xs).shape, WALL, dtype=np.uint8)
+        if values.size == 0:
+            return values
+        index = ys // self.chunk_height
+        for chunk_index in range(int(index.min()), int(index.max()) + 1):
+            hit = index == chunk_index
+            if hit.any():
+                grid = self.chunk(chunk_index)[0]
+                values[hit] = grid[ys[hit] - chunk_index * self.chunk_height, xs[hit]]
+        return values
+
+    def region(self, top, rows):
+        """Grid rows top..top+rows as an array; rows above the maze read as walls"""
+        grid = np.full((rows, self.width), WALL, dtype=np.uint8)
+        y = max(top, 0)
+        while y < top + rows:
+            index, row = divmod(y, self.chunk_height)
+            count = min(self.chunk_height - row, top + rows - y)
+            grid[y - top:y - top + count] = self.chunk(index)[0][row:row + count]
+            y += count
+        return grid
+
+    def texture_ids(self):
+        """wall_texture_ids for the endless maze: every face is a plain wall, and no memory is used"""
+        return np.broadcast_to(np.uint8(WALL_TEXTURE), (2,) + self.shape)
@@ -0,0 +1,159 @@
+import json
+import math
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    difficulty TEXT NOT NULL,
+    score REAL NOT NULL,
+    elapsed REAL,
+    map_views INTEGER,
+    minimap INTEGER,
+    seed INTEGER,
+    finished_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (difficulty, score DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+'''
+COLUMNS = ('id', 'difficulty', 'score', 'elapsed', 'map_views', 'minimap', 'seed', 'finished_at')
+# Used when the database file can't be opened: shared by the reader and writer
+# connections of this process and gone when the game exits
+FALLBACK_PATH = 'file:leaderboard?mode=memory&cache=shared'
+
+
+def connect(path):
+    """Open the database in WAL mode so reads never wait on the writer"""
+    connection = sqlite3.connect(path, timeout=10, uri=path.startswith('file:'))
+    connection.execute('PRAGMA journal_mode=WAL')
+    # NORMAL is still crash-safe in WAL mode; only an OS crash can lose the last commits
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class Leaderboard:
+    """Run history and per-difficulty rankings stored in SQLite
+
+    record() only queues the run; a background thread owns the write
+    connection, so finishing a maze never waits on the disk. Best scores
+    are kept in memory and updated immediately, while top() and history()
+    read what has been committed (call flush() first to include queued runs).
+    """
+
+    def __init__(self, path='leaderboard.db', legacy_path=None):
+        self.path = path
+        try:
+            self.reader = connect(path)
+        except sqlite3.DatabaseError as e:
+            print(f"Warning: could not open {path} ({e}); runs this session will not be saved")
+            self.path = FALLBACK_PATH
+            self.reader = connect(self.path)
+        if legacy_path:
+            self.migrate_json(legacy_path)
+        self.best_scores = dict(self.reader.execute(
+            'SELECT difficulty, MAX(score) FROM runs GROUP BY difficulty'))
+
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, name='leaderboard-writer', daemon=True)
+        self.writer.start()
+
+    def migrate_json(self, legacy_path):
+        """Import the old high_scores.json once, as one undated run per difficulty
+
+        The old game saved a score only when it was lower than the stored
+        one, so the file holds each difficulty's lowest score rather than its
+        best. They are still real runs and are imported as such.
+        """
+        if self.reader.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        try:
+            with open(legacy_path) as f:
+                scores = json.load(f)
+        except OSError:
+            scores = {}
+        except ValueError:
+            print(f"Warning: {legacy_path} is not valid JSON; its high scores were not imported")
+            scores = {}
+
+        with self.reader:
+            for difficulty, score in scores.items():
+                # The old file used infinity for "no score yet"
+                if isinstance(score, (int, float)) and math.isfinite(score):
+                    self.reader.execute('INSERT INTO runs (difficulty, score, finished_at) VALUES (?, ?, ?)',
+                                        (difficulty, score, 'imported'))
+            self.reader.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (legacy_path,))
+
+    def record(self, difficulty, score, elapsed=None, map_views=None, minimap=None, seed=None):
+        """Queue a finished run for writing; return True if it is a new best"""
+        best = self.best_scores.get(difficulty)
+        is_best = best is None or score > best
+        if is_best:
+            self.best_scores[difficulty] = score
+        finished_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.pending.put((difficulty, score, elapsed, map_views,
+                          None if minimap is None else int(minimap), seed, finished_at))
+        return is_best
+
+    def write_loop(self):
+        """Writer thread: insert queued runs, one transaction per batch"""
+        try:
+            connection = connect(self.path)
+        except sqlite3.DatabaseError as e:
+            print(f"Warning: could not open {self.path} for writing ({e}); runs will not be saved")
+            connection = None
+        while True:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            runs = [run for run in batch if run is not None]
+            if runs and connection is not None:
+                try:
+                    with connection:
+                        connection.executemany(
+                            'INSERT INTO runs (difficulty, score, elapsed, map_views, minimap, seed, finished_at) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)', runs)
+                except sqlite3.Error as e:
+                    print(f"Warning: could not save {len(runs)} run(s) to {self.path}: {e}")
+            for _ in batch:
+                self.pending.task_done()
+            if None in batch:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def best(self, difficulty):
+        """Highest score on record for difficulty, or None"""
+        return self.best_scores.get(difficulty)
+
+    def top(self, difficulty, n=10):
+        """The n best runs for difficulty, as dicts, best first"""
+        rows = self.reader.execute('SELECT * FROM runs WHERE difficulty = ? ORDER BY score DESC, id LIMIT ?',
+                                   (difficulty, n))
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def history(self, limit=20, difficulty=None):
+        """The most recent runs, newest first, optionally for one difficulty"""
+        if difficulty is None:
+            rows = self.reader.execute('SELECT * FROM runs ORDER BY id DESC LIMIT ?', (limit,))
+        else:
+            rows = self.reader.execute('SELECT * FROM runs WHERE difficulty = ? ORDER BY id DESC LIMIT ?',
+                                       (difficulty, limit))
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def flush(self):
+        """Block until every queued run has been written"""
+        self.pending.join()
+
+    def close(self):
+        """Write what is queued, then stop the writer thread"""
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        self.reader.close()
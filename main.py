@@ -1,42 +1,28 @@
 import pygame
+import os
 import time
 import random
-import json
 import math
+import sys
 from enum import Enum
 from datetime import datetime
+import numpy as np
+from constants import *
+import maze as maze_gen
+from assets import AssetManager, load_scaled_image, solid_surface
+from corridors import corridor_runs
+from endless import EndlessMaze
+from leaderboard import Leaderboard
+from maze_pool import MazePool
+from mazefile import PackedMaze, load_maze
+from overlays import PATH_COLOR, Minimap, StreamingMinimap, maze_surface
+from pathfield import ExitField
+from profiler import HUD_REFRESH_FRAMES, FrameProfiler
+from raycaster import ResolutionScaler, VectorRaycaster, ray_directions
+from replay import EVENT_HINTS, EVENT_MAP, RunRecorder
+from simulation import START_POS, MazeSimulation, calculate_score, keys_to_action
+from textures import TextCache, TextureAtlas, texture_rows, wall_texture_ids
 #code
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-CELL_SIZE = 20
-PLAYER_SPEED = 0.05  # Reduced for better control
-ROTATION_SPEED = 0.03  # Reduced for smoother rotation
-EPSILON = 1e-10
-TEXTURE_SIZE = 64
-FOV = math.pi / 3 # 60 - degree field of view
-
-# Game settings for different difficulties
-DIFFICULTY_SETTINGS = {
-    'Easy': {
-        'maze_size': 11,
-        'initial_view_time': 8,
-        'top_view_allowed': 2,
-        'score_multiplier': 1
-    },
-    'Medium': {
-        'maze_size': 15,
-        'initial_view_time': 6,
-        'top_view_allowed': 2,
-        'score_multiplier': 2
-    },
-    'Hard': {
-        'maze_size': 21,
-        'initial_view_time': 4,
-        'top_view_allowed': 2,
-        'score_multiplier': 3
-    }
-}
 
 class GameState(Enum):
     MENU = 1
@@ -45,87 +31,109 @@ class GameState(Enum):
     INSTRUCTIONS = 4
 
 class Game:
-    def __init__(self):
+    def __init__(self, maze_pool_size=MAZE_POOL_SIZE, asset_cache_dir=ASSET_CACHE_DIR,
+                 render_workers=RENDER_WORKERS):
         pygame.init()
         pygame.font.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("MemoMaze")
         self.clock = pygame.time.Clock()
         self.state = GameState.MENU
-        self.assets = self.load_assets()
-        self.init_textures()
+        self.assets = self.load_assets(asset_cache_dir)
+        self.renderer = RENDERER
+        self.corridor_jumps = CORRIDOR_JUMPS
+        self.render_workers = render_workers
+        self.profiler = FrameProfiler(log_path=PROFILE_LOG)
+        # Built by init_textures once the in-game textures are needed
+        self.atlas = None
+        self.wall_texels = None
+        self.raycaster = None
+        self.scaled_raycasters = {}
+        self.resolution = None
+        if DYNAMIC_RESOLUTION:
+            self.resolution = ResolutionScaler(TARGET_FRAME_MS, MIN_RENDER_SCALE)
+        self.grid_source = None
+        self.grid = None
+        self.grid_rows = None
+        self.texture_ids = None
+        self.corridors = None
+        self.corridor_rows = None
+        self.exit_field = None
+        self.show_hints = False
+        # perf_counter time the map overlay (memorize phase or an M peek) closes, None while it is down
+        self.map_view_end = None
+        self.maze_seed = None
+        self.top_view_cache = None
+        self.text_cache = TextCache()
+        self.drawn_state = None
+        self.minimap = None
+        self.sim = None
+        self.recorder = None
+        self.view_key = None
+        self.idle_frames = 0
+        self.maze_file = None
+        self.maze_pool = None
+        if maze_pool_size:
+            self.maze_pool = MazePool(maze_pool_size, MAZE_POOL_WORKERS, MAZE_ALGORITHM, MAZE_POOL_CACHE)
         self.difficulty = None
         self.top_view_counts = 0
         self.show_minimap = False
         self.score = 0
         self.start_time = None
+        self.leaderboard = None
         self.load_high_scores()
 
-    def load_assets(self):
-        """Load and prepare game assets"""
-        assets = {}
-        try:
-            assets['font'] = pygame.font.Font('mario_font.ttf', 60)
-            assets['medium_font'] = pygame.font.Font('mario_font.ttf', 45)
-            assets['small_font'] = pygame.font.Font('mario_font.ttf', 20)
-
-            # Load sky texture
-            try:
-                sky = pygame.image.load('sky.jpg')
-                assets['sky'] = pygame.transform.scale(sky, (SCREEN_WIDTH, SCREEN_HEIGHT // 2))
-            except:
-                assets['sky'] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT // 2))
-                assets['sky'].fill((135, 206, 235))
-
-            # Load background
-            try:
-                bg = pygame.image.load('maze_bg.png')
-                assets['background'] = pygame.transform.scale(bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            except:
-                assets['background'] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                assets['background'].fill((135, 206, 235))
-
-            # Load exit texture
-            # In load_assets method, after loading exit texture:
-            try:
-                exit_tex = pygame.image.load('maze_exit.jpeg')
-                assets['exit_wall'] = pygame.transform.scale(exit_tex, (TEXTURE_SIZE, TEXTURE_SIZE))
-            except Exception as e:
-                assets['exit_wall'] = pygame.Surface((TEXTURE_SIZE, TEXTURE_SIZE))
-                assets['exit_wall'].fill((0, 0, 0))
-
-        except:
-            assets['font'] = pygame.font.Font(None, 74)
-            assets['medium_font'] = pygame.font.Font(None, 55)
-            assets['small_font'] = pygame.font.Font(None, 36)
-            assets['background'] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            assets['background'].fill((135, 206, 235))
-            assets['sky'] = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT // 2))
-            assets['sky'].fill((135, 206, 235))
-            assets['exit_wall'] = pygame.Surface((TEXTURE_SIZE, TEXTURE_SIZE))
-            assets['exit_wall'].fill((255, 0, 0))
+    def load_assets(self, cache_dir=ASSET_CACHE_DIR):
+        """Load the menu assets now and the in-game textures in the background"""
+        assets = AssetManager()
+        sky_color = (135, 206, 235)
+        assets.add('font', lambda: pygame.font.Font('mario_font.ttf', 60), lambda: pygame.font.Font(None, 74))
+        assets.add('medium_font', lambda: pygame.font.Font('mario_font.ttf', 45),
+                   lambda: pygame.font.Font(None, 55))
+        assets.add('small_font', lambda: pygame.font.Font('mario_font.ttf', 20),
+                   lambda: pygame.font.Font(None, 36))
+        assets.add('hud_font', lambda: pygame.font.Font(None, 22), lambda: pygame.font.Font(None, 22))
+        assets.add('timestamp_font', lambda: pygame.font.Font(None, 24), lambda: pygame.font.Font(None, 24))
+
+        # Load background
+        assets.add('background',
+                   lambda: load_scaled_image('maze_bg.png', (SCREEN_WIDTH, SCREEN_HEIGHT), cache_dir),
+                   lambda: solid_surface((SCREEN_WIDTH, SCREEN_HEIGHT), sky_color))
+
+        # Sky and exit textures are first needed once a game starts
+        assets.add('sky',
+                   lambda: load_scaled_image('sky.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT // 2), cache_dir),
+                   lambda: solid_surface((SCREEN_WIDTH, SCREEN_HEIGHT // 2), sky_color), background=True)
+        assets.add('exit_wall',
+                   lambda: load_scaled_image('maze_exit.jpeg', (TEXTURE_SIZE, TEXTURE_SIZE), cache_dir),
+                   lambda: solid_surface((TEXTURE_SIZE, TEXTURE_SIZE), (0, 0, 0)), background=True)
 
         # Create wall texture
         wall_surface = pygame.Surface((TEXTURE_SIZE, TEXTURE_SIZE))
         wall_surface.fill((139, 69, 19))
         pygame.draw.rect(wall_surface, (101, 67, 33), (0, 0, TEXTURE_SIZE, TEXTURE_SIZE // 8))
-
         assets['wall'] = wall_surface
-        assets['ground'] = pygame.Surface((TEXTURE_SIZE, TEXTURE_SIZE))
-        assets['ground'].fill((173, 208, 179))
+
+        # Create ground texture: four flagstones with darker joints
+        ground_surface = pygame.Surface((TEXTURE_SIZE, TEXTURE_SIZE))
+        ground_surface.fill(FLOOR_COLOR)
+        joint = tuple(int(c * 0.85) for c in FLOOR_COLOR)
+        for offset in (0, TEXTURE_SIZE // 2):
+            pygame.draw.line(ground_surface, joint, (offset, 0), (offset, TEXTURE_SIZE - 1), 2)
+            pygame.draw.line(ground_surface, joint, (0, offset), (TEXTURE_SIZE - 1, offset), 2)
+        assets['ground'] = ground_surface
 
         return assets
 
     def init_textures(self):
-        """Initialize and prepare textures for rendering"""
-        self.wall_texture = self.assets['wall']
-        self.ground_pattern = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT // 2))
-        ground_tex = self.assets['ground']
-
-        # Create repeating ground pattern
-        for y in range(0, SCREEN_HEIGHT // 2, TEXTURE_SIZE):
-            for x in range(0, SCREEN_WIDTH, TEXTURE_SIZE):
-                self.ground_pattern.blit(ground_tex, (x, y))
+        """Initialize and prepare textures for rendering, waiting for background loads"""
+        # Atlas order follows the texture ids: WALL_TEXTURE, EXIT_TEXTURE
+        self.atlas = TextureAtlas([self.assets['wall'], self.assets['exit_wall']],
+                                  FOG_LEVELS, FOG_COLOR, FOG_DISTANCE)
+        # Pre-shaded texels as the display's raw pixel values, indexed [texture, side, fog, x, y]
+        self.wall_texels = self.atlas.raw_columns(self.screen)
+        self.raycaster = VectorRaycaster(self.assets['sky'], self.atlas, profiler=self.profiler,
+                                         floor_texture=self.floor_texture(), workers=self.render_workers)
 
     def draw_menu(self):
         """Draw main menu"""
@@ -137,7 +145,7 @@ class Game:
 
         # Draw difficulty options
         y_pos = 250
-        for diff in ['1. Easy', '2. Medium', '3. Hard']:
+        for diff in ['1. Easy', '2. Medium', '3. Hard', '4. Endless']:
             self.draw_text(f"{diff}", 'medium', SCREEN_WIDTH // 2, y_pos, (0, 0, 0))
             y_pos += 70
 
@@ -159,6 +167,7 @@ class Game:
             f"Press M to view map 2 times.",
             "After using both map views,",
             "press M once more for permanent minimap.",
+            "Press H for exit hints (costs points).",
             "",
             "Press SPACE to return to menu."
         ]
@@ -171,8 +180,8 @@ class Game:
         pygame.display.flip()
 
     def handle_menu_input(self):
-        """Handle menu input"""
-        for event in pygame.event.get():
+        """Handle menu input, waiting for the next event"""
+        for event in self.wait_events():
             if event.type == pygame.QUIT:
                 return False
             if event.type == pygame.KEYDOWN:
@@ -185,6 +194,9 @@ class Game:
                 elif event.key == pygame.K_3 or event.key == pygame.K_h:
                     self.difficulty = 'Hard'
                     self.start_game()
+                elif event.key == pygame.K_4:
+                    self.difficulty = 'Endless'
+                    self.start_game()
                 elif event.key == pygame.K_i:
                     self.state = GameState.INSTRUCTIONS
                 elif event.key == pygame.K_SPACE and self.state == GameState.INSTRUCTIONS:
@@ -196,12 +208,25 @@ class Game:
         self.state = GameState.PLAYING
         self.top_view_counts = 0
         self.show_minimap = False
+        self.show_hints = False
         self.start_time = time.time()
 
         settings = DIFFICULTY_SETTINGS[self.difficulty]
-        self.maze = self.generate_maze(settings['maze_size'], settings['maze_size'])
-        # Initial view with starting position and angle
-        self.display_top_view(self.maze, settings['initial_view_time'], [1.5, 1.5], 0)
+        if settings.get('endless'):
+            self.maze_seed = random.getrandbits(63)
+            self.maze = EndlessMaze(settings['maze_size'], self.maze_seed, ENDLESS_CHUNK_ROWS, ENDLESS_MAX_CHUNKS)
+        elif self.maze_file is not None:
+            self.maze, self.maze_seed = self.maze_file, self.maze_file.seed
+        elif self.maze_pool is not None:
+            self.maze_seed, self.maze = self.maze_pool.get(self.difficulty)
+        else:
+            self.maze = self.generate_maze(settings['maze_size'], settings['maze_size'])
+        # Per-maze tables, including the exit distance field, are built once here
+        self.maze_grid(self.maze)
+        self.top_view_cache = None
+        self.minimap = None
+        # The memorize phase: the first-person loop opens on the map for initial_view_time
+        self.map_view_end = time.perf_counter() + settings['initial_view_time']
 
     def display_game_over(self, elapsed_time):
         """Display game over screen with simplified score display"""
@@ -216,7 +241,8 @@ class Game:
         stats = [
             f"Time: {elapsed_time:.2f} seconds",
             f"Map Views: {self.top_view_counts}",
-            f"Minimap Used: {'Yes' if self.show_minimap else 'No'}"
+            f"Minimap Used: {'Yes' if self.show_minimap else 'No'}",
+            f"Route Efficiency: {self.sim.efficiency() if self.sim else 1.0:.0%}"
         ]
 
         for stat in stats:
@@ -225,8 +251,8 @@ class Game:
 
         # Draw final scores
         y_pos += 20
-        final_score = self.calculate_score()
-        high_score = self.high_scores.get(self.difficulty, 0)
+        final_score = self.calculate_score(elapsed_time)
+        high_score = self.leaderboard.best(self.difficulty) or 0
 
         self.draw_text(f"Final Score: {final_score}", 'small', SCREEN_WIDTH // 2, y_pos, (0, 0, 0))
         y_pos += 50
@@ -237,108 +263,219 @@ class Game:
 
         # Current timestamp
         timestamp = f"Completed on: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC"
-        timestamp_surface = pygame.font.Font(None, 24).render(timestamp, True, (100, 100, 100))
+        timestamp_surface = self.text_surface(timestamp, 'timestamp', (100, 100, 100))
         timestamp_rect = timestamp_surface.get_rect(bottomright=(SCREEN_WIDTH - 10, SCREEN_HEIGHT - 10))
         self.screen.blit(timestamp_surface, timestamp_rect)
 
         pygame.display.flip()
 
-    def generate_maze(self, width, height):
-        """Generate a random maze using depth-first search"""
-        maze = [[1] * width for _ in range(height)]
-
-        def carve(x, y):
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            random.shuffle(directions)
-
-            for dx, dy in directions:
-                nx, ny = x + dx * 2, y + dy * 2
-                if 0 <= nx < width and 0 <= ny < height and maze[ny][nx] == 1:
-                    maze[ny][nx] = 0
-                    maze[y + dy][x + dx] = 0
-                    carve(nx, ny)
-
-        # Start from the center
-        start_x, start_y = 1, 1
-        maze[start_y][start_x] = 0
-        carve(start_x, start_y)
-
-        # Create exit
-        maze[height - 2][width - 2] = 0
-        return maze
-
-    def display_top_view(self, maze, view_time, player_pos=None, player_angle=None):
-        """Display top-down view of the maze"""
-        width, height = len(maze[0]), len(maze)
-        cell_size = min(SCREEN_WIDTH // width, SCREEN_HEIGHT // height)
-        start_time = time.time()
-
-        surface = pygame.Surface((width * cell_size, height * cell_size))
-        while time.time() - start_time < view_time:
-            surface.fill((0, 0, 0))
-
-            # Draw maze
-            for y, row in enumerate(maze):
-                for x, cell in enumerate(row):
-                    rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
-                    if cell == 0:
-                        if (x, y) == (width - 2, height - 2):
-                            pygame.draw.rect(surface, (255, 0, 0), rect)  # Red exit
-                        else:
-                            pygame.draw.rect(surface, (255, 255, 255), rect)  # White path
-                    else:
-                        pygame.draw.rect(surface, (139, 69, 19), rect)  # Brown walls
-
-            # Center the maze on screen
-            self.screen.fill((0, 0, 0))
-            maze_rect = surface.get_rect(center=self.screen.get_rect().center)
-            self.screen.blit(surface, maze_rect)
-
-            # Draw player position if available
-            if player_pos is not None:
-                player_screen_x = maze_rect.left + player_pos[0] * cell_size
-                player_screen_y = maze_rect.top + player_pos[1] * cell_size
-                pygame.draw.circle(self.screen, (0, 255, 0),
-                                   (int(player_screen_x), int(player_screen_y)),
-                                   cell_size // 3)
-
-                # Draw player direction if angle is available
-                if player_angle is not None:
-                    direction_end = (
-                        int(player_screen_x + math.cos(player_angle) * cell_size),
-                        int(player_screen_y + math.sin(player_angle) * cell_size)
-                    )
-                    pygame.draw.line(self.screen, (0, 255, 0),
-                                     (int(player_screen_x), int(player_screen_y)),
-                                     direction_end, 2)
-
-            # Draw countdown
-            remaining = int(view_time - (time.time() - start_time)) + 1
-            countdown_text = str(remaining)
-            text_surface = self.assets['font'].render(countdown_text, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(topright=(SCREEN_WIDTH - 10, 10))
-            self.screen.blit(text_surface, text_rect)
-
-            pygame.display.flip()
+    def generate_maze(self, width, height, seed=None, algorithm=MAZE_ALGORITHM):
+        """Generate a random maze grid, seeded so it can be regenerated"""
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.maze_seed = seed
+        return maze_gen.generate_maze(width, height, seed, algorithm)
+
+    def top_view_layer(self, maze, player_pos=None):
+        """Return the top-down maze surface, its cell size and the (column, row) at its top left
+
+        A fixed maze that fits the screen at a pixel or more per cell is
+        rasterized once. An endless maze, or one too large for that, shows a
+        screenful of cells around the player, rasterized again only when that
+        window moves.
+        """
+        if isinstance(maze, EndlessMaze):
+            grid, cell_size = maze, 0
+            width, height = maze.width, maze.height
+        else:
+            grid = self.maze_grid(maze)
+            height, width = grid.shape
+            cell_size = min(SCREEN_WIDTH // width, SCREEN_HEIGHT // height)
+        if cell_size:
+            if self.top_view_cache is None:
+                surface = maze_surface(np.asarray(grid, dtype=np.uint8), cell_size,
+                                       exit_cell=maze_gen.exit_of(grid))
+                self.top_view_cache = (surface.convert(), cell_size, (0, 0))
+            return self.top_view_cache
+
+        cols = min(SCREEN_WIDTH // CELL_SIZE, width)
+        rows = min(SCREEN_HEIGHT // CELL_SIZE, height)
+        player_x, player_y = (int(player_pos[0]), int(player_pos[1])) if player_pos is not None else (0, 0)
+        origin = (min(max(0, player_x - cols // 2), width - cols),
+                  min(max(0, player_y - rows // 2), height - rows))
+        if self.top_view_cache is None or self.top_view_cache[2] != origin:
+            left, top = origin
+            if isinstance(maze, EndlessMaze):
+                surface = maze_surface(maze.region(top, rows), CELL_SIZE, exit_color=PATH_COLOR)
+            else:
+                exit_x, exit_y = maze_gen.exit_of(grid)
+                cells = grid[np.arange(top, top + rows)[:, None], np.arange(left, left + cols)[None, :]]
+                surface = maze_surface(cells, CELL_SIZE, exit_cell=(exit_x - left, exit_y - top))
+            self.top_view_cache = (surface.convert(), CELL_SIZE, origin)
+        return self.top_view_cache
+
+    def map_countdown(self):
+        """Whole seconds left on the map overlay as its countdown shows them, or None while it is down"""
+        if self.map_view_end is None:
+            return None
+        return int(self.map_view_end - time.perf_counter()) + 1
+
+    def draw_top_view(self, maze, remaining, player_pos=None, player_angle=None):
+        """Draw one frame of the top-down view with the countdown"""
+        surface, cell_size, (origin_x, origin_y) = self.top_view_layer(maze, player_pos)
+
+        # Center the maze on screen
+        self.screen.fill((0, 0, 0))
+        maze_rect = surface.get_rect(center=self.screen.get_rect().center)
+        self.screen.blit(surface, maze_rect)
+
+        # With hints on, trace the shortest route from the player to the exit
+        if self.show_hints and player_pos is not None and self.exit_field is not None:
+            route = self.exit_field.route(player_pos)
+            if len(route) > 1:
+                points = [(maze_rect.left + (x - origin_x + 0.5) * cell_size,
+                           maze_rect.top + (y - origin_y + 0.5) * cell_size)
+                          for x, y in route]
+                pygame.draw.lines(self.screen, HINT_COLOR, False, points, max(1, cell_size // 4))
+
+        # Draw player position if available
+        if player_pos is not None:
+            player_screen_x = maze_rect.left + (player_pos[0] - origin_x) * cell_size
+            player_screen_y = maze_rect.top + (player_pos[1] - origin_y) * cell_size
+            pygame.draw.circle(self.screen, (0, 255, 0),
+                               (int(player_screen_x), int(player_screen_y)),
+                               cell_size // 3)
+
+            # Draw player direction if angle is available
+            if player_angle is not None:
+                direction_end = (
+                    int(player_screen_x + math.cos(player_angle) * cell_size),
+                    int(player_screen_y + math.sin(player_angle) * cell_size)
+                )
+                pygame.draw.line(self.screen, (0, 255, 0),
+                                 (int(player_screen_x), int(player_screen_y)),
+                                 direction_end, 2)
+
+        # Draw countdown
+        text_surface = self.text_surface(str(remaining), 'large', (255, 255, 255))
+        text_rect = text_surface.get_rect(topright=(SCREEN_WIDTH - 10, 10))
+        self.screen.blit(text_surface, text_rect)
+
+    def floor_texture(self):
+        """The ground texture if the floor is textured, else None for a flat floor"""
+        return self.assets['ground'] if FLOOR_TEXTURE else None
 
     def render_frame(self, player_pos, player_angle, maze):
         """Render a single frame of the 3D view"""
+        if self.raycaster is None:
+            self.init_textures()
+        if self.renderer == 'numpy':
+            scale = self.resolution.scale if self.resolution is not None else 1.0
+            self.profiler.count('scale%', int(scale * 100))
+            if scale == 1.0:
+                self.raycaster.render(self.screen, player_pos, player_angle, self.maze_grid(maze),
+                                      self.texture_ids, self.corridors)
+            else:
+                # Render at the reduced internal resolution and upscale to the screen
+                raycaster, surface = self.scaled_raycaster(scale)
+                raycaster.render(surface, player_pos, player_angle, self.maze_grid(maze), self.texture_ids,
+                                 self.corridors)
+                pygame.transform.scale(surface, (SCREEN_WIDTH, SCREEN_HEIGHT), self.screen)
+                self.profiler.mark('upscale')
+            return
+
         self.screen.fill((0, 0, 0))
 
         # Draw sky texture
         self.screen.blit(self.assets['sky'], (0, 0))
+        self.profiler.mark('sky')
 
         # Draw floor with new color #985f2a
-        pygame.draw.rect(self.screen, (173, 208, 179),
-                         (0, SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT // 2))
-
-        # Ray casting
+        floor = self.raycaster.floor
+        if floor is not None:
+            # Same per-row distance tables as the NumPy renderer, written before the walls
+            dir_x, dir_y = ray_directions(player_angle, self.raycaster.columns)
+            floor_area = self.screen.subsurface((0, floor.horizon, SCREEN_WIDTH, SCREEN_HEIGHT - floor.horizon))
+            pygame.surfarray.blit_array(floor_area, floor.cast(self.screen, player_pos, dir_x, dir_y))
+        else:
+            pygame.draw.rect(self.screen, FLOOR_COLOR,
+                             (0, SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT // 2))
+        self.profiler.mark('floor')
+
+        # Ray casting over plain lists, which index faster than array rows. Strips are
+        # written straight into the screen's pixels, locked once for the whole frame
+        self.maze_grid(maze)
+        frame = pygame.surfarray.pixels2d(self.screen)
+        steps = saved = 0
         for x in range(SCREEN_WIDTH):
             ray_angle = (player_angle - FOV / 2) + (x / SCREEN_WIDTH) * FOV
-            self.cast_ray(x, ray_angle, player_pos, maze)
-
-    def cast_ray(self, x, ray_angle, player_pos, maze):
-        """Cast a single ray and render the corresponding wall strip"""
+            ray_steps, ray_saved = self.cast_ray(x, ray_angle, player_pos, self.grid_rows, frame)
+            steps += ray_steps
+            saved += ray_saved
+        del frame
+        self.profiler.count('rays', SCREEN_WIDTH)
+        self.profiler.count('dda_steps', steps)
+        self.profiler.count('dda_saved', saved)
+        # Each column is cast and drawn in turn, so 'walls' also covers the rays
+        self.profiler.mark('walls')
+
+    def scaled_raycaster(self, scale):
+        """Return the raycaster and target surface for an internal render scale"""
+        if scale not in self.scaled_raycasters:
+            size = (int(SCREEN_WIDTH * scale), int(SCREEN_HEIGHT * scale))
+            raycaster = VectorRaycaster(self.assets['sky'], self.atlas, size[0], size[1], profiler=self.profiler,
+                                        floor_texture=self.floor_texture(), workers=self.render_workers)
+            self.scaled_raycasters[scale] = (raycaster, pygame.Surface(size).convert())
+        return self.scaled_raycasters[scale]
+
+    def maze_grid(self, maze):
+        """Return maze as a uint8 array, converting it once per maze"""
+        if maze is not self.grid_source:
+            self.grid_source = maze
+            if isinstance(maze, EndlessMaze):
+                # Cells are read through the maze's chunk cache; there is no exit to route to,
+                # and rays step cell by cell rather than keep corridor tables for every chunk
+                self.grid = self.grid_rows = maze
+                self.texture_ids = maze.texture_ids()
+                self.corridors = self.corridor_rows = None
+                self.exit_field = None
+                return self.grid
+            if isinstance(maze, PackedMaze):
+                # Read cells straight from the memory-mapped file
+                self.grid = maze
+                self.grid_rows = maze.rows
+            else:
+                self.grid = np.asarray(maze, dtype=np.uint8)
+                self.grid_rows = self.grid.tolist()
+            self.corridors = self.corridor_rows = None
+            # Packed mazes skip the tables, which take a byte per cell and direction
+            if self.corridor_jumps and not isinstance(maze, PackedMaze):
+                self.corridors = corridor_runs(self.grid)
+                self.corridor_rows = self.corridors.tolist()
+            self.texture_ids = wall_texture_ids(self.grid)
+            self.exit_field = ExitField(self.grid)
+        return self.grid
+
+    def renderer_mismatch(self, player_pos, player_angle, maze):
+        """Render a pose with both renderers and return the differing pixel count"""
+        current = self.renderer
+        try:
+            frames = []
+            for renderer in ('python', 'numpy'):
+                self.renderer = renderer
+                self.render_frame(player_pos, player_angle, maze)
+                frames.append(pygame.surfarray.array2d(self.screen))
+        finally:
+            self.renderer = current
+        return int(np.count_nonzero(frames[0] != frames[1]))
+
+    def cast_ray(self, x, ray_angle, player_pos, maze, frame=None):
+        """Cast a single ray and render the corresponding wall strip
+
+        frame is the screen's pixels2d array when the caller already holds it.
+        Returns the DDA steps taken and the steps saved by jumping along
+        corridors with the maze's corridor_runs table.
+        """
         ray_dir = (math.cos(ray_angle), math.sin(ray_angle))
         map_pos = [int(player_pos[0]), int(player_pos[1])]
 
@@ -357,7 +494,48 @@ class Game:
 
         hit = False
         side = 0
+        steps = 0
+        saved = 0
+        if self.corridor_rows is not None:
+            # Walls are read from the corridor tables, the open cells ahead in the ray's x and y
+            # step directions (STEPS codes), with the same jumps as march_rays so both
+            # renderers stay identical
+            runs_x = self.corridor_rows[2 if ray_dir[0] < 0 else 0]
+            runs_y = self.corridor_rows[3 if ray_dir[1] < 0 else 1]
+            jump_x = 2 * delta_dist[0]
+            jump_y = 2 * delta_dist[1]
+            while not hit:
+                steps += 1
+                if side_dist[0] < side_dist[1]:
+                    run = runs_x[map_pos[1]][map_pos[0]]
+                    # Only a ray two steps or more from turning can jump
+                    if run > 1 and side_dist[1] - side_dist[0] >= jump_x:
+                        jump = min(run, int((side_dist[1] - side_dist[0]) / delta_dist[0]))
+                        if jump > 1:
+                            side_dist[0] += jump * delta_dist[0]
+                            map_pos[0] += jump * step[0]
+                            saved += jump - 1
+                            continue
+                    side_dist[0] += delta_dist[0]
+                    map_pos[0] += step[0]
+                    side = 0
+                else:
+                    run = runs_y[map_pos[1]][map_pos[0]]
+                    # Only a ray two steps or more from turning can jump
+                    if run > 1 and side_dist[0] - side_dist[1] >= jump_y:
+                        jump = min(run, int((side_dist[0] - side_dist[1]) / delta_dist[1]))
+                        if jump > 1:
+                            side_dist[1] += jump * delta_dist[1]
+                            map_pos[1] += jump * step[1]
+                            saved += jump - 1
+                            continue
+                    side_dist[1] += delta_dist[1]
+                    map_pos[1] += step[1]
+                    side = 1
+                hit = run == 0
+
         while not hit:
+            steps += 1
             if side_dist[0] < side_dist[1]:
                 side_dist[0] += delta_dist[0]
                 map_pos[0] += step[0]
@@ -387,118 +565,133 @@ class Game:
         draw_start = max(0, -line_height // 2 + SCREEN_HEIGHT // 2)
         draw_end = min(SCREEN_HEIGHT - 1, line_height // 2 + SCREEN_HEIGHT // 2)
 
-        # Check if this is the exit wall
-        exit_x, exit_y = len(maze[0]) - 2, len(maze) - 2
-        is_exit = False
-
-        # We only want to show the exit texture on the wall that leads to the exit
-        # Check if we hit a wall and if it's adjacent to the exit cell
-        if hit and maze[map_pos[1]][map_pos[0]] == 1:  # We hit a wall
-            # Check if this wall is directly adjacent to the exit cell
-            # and if it's the wall we need to pass through to reach the exit
-            if ((map_pos[0] == exit_x + 1 and map_pos[1] == exit_y) or  # Right wall
-                    (map_pos[0] == exit_x - 1 and map_pos[1] == exit_y) or  # Left wall
-                    (map_pos[0] == exit_x and map_pos[1] == exit_y + 1) or  # Bottom wall
-                    (map_pos[0] == exit_x and map_pos[1] == exit_y - 1)):  # Top wall
-
-                # Additional check to ensure it's the wall facing the exit
-                if ((map_pos[0] == exit_x + 1 and side == 0) or  # Right wall
-                        (map_pos[0] == exit_x - 1 and side == 0) or  # Left wall
-                        (map_pos[0] == exit_x and map_pos[1] == exit_y + 1 and side == 1) or  # Bottom wall
-                        (map_pos[0] == exit_x and map_pos[1] == exit_y - 1 and side == 1)):  # Top wall
-                    is_exit = True
-
-        if is_exit:
-            # Use exit wall texture
-            texture = self.assets['exit_wall']
-
-            # Calculate texture coordinates
-            if side == 0:
-                wall_x = player_pos[1] + wall_dist * ray_dir[1]
-            else:
-                wall_x = player_pos[0] + wall_dist * ray_dir[0]
-            wall_x -= math.floor(wall_x)
-
-            tex_x = int(wall_x * TEXTURE_SIZE)
-            if (side == 0 and ray_dir[0] > 0) or (side == 1 and ray_dir[1] < 0):
-                tex_x = TEXTURE_SIZE - tex_x - 1
-
-            # Draw textured strip
-            h = draw_end - draw_start
-            if h > 0:  # Prevent division by zero
-                step = TEXTURE_SIZE / h
-                tex_pos = 0
-
-                for y in range(draw_start, draw_end):
-                    tex_y = int(tex_pos) & (TEXTURE_SIZE - 1)
-                    tex_pos += step
-                    try:
-                        color = texture.get_at((tex_x, tex_y))
-                        if side == 1:  # Darken one side
-                            color = (int(color[0] * 0.7), int(color[1] * 0.7), int(color[2] * 0.7))
-                        self.screen.set_at((x, y), color)
-                    except IndexError:
-                        # Fallback if texture sampling fails
-                        color = (255, 0, 0)  # Bright red for debugging
-                        pygame.draw.line(self.screen, color, (x, draw_start), (x, draw_end), 1)
+        # One lookup in the maze's texture grid picks the wall's texture
+        height, width = len(maze), len(maze[0])
+        texture = int(self.texture_ids[side, min(max(map_pos[1], 0), height - 1),
+                                       min(max(map_pos[0], 0), width - 1)])
+
+        # Calculate texture coordinates
+        if side == 0:
+            wall_x = player_pos[1] + wall_dist * ray_dir[1]
         else:
-            # Draw regular wall
-            color = (139, 69, 19)  # Brown color for walls
-            if side == 1:  # Darker for one side to create depth
-                color = (color[0] * 0.7, color[1] * 0.7, color[2] * 0.7)
-            pygame.draw.line(self.screen, color, (x, draw_start), (x, draw_end), 1)
+            wall_x = player_pos[0] + wall_dist * ray_dir[0]
+        wall_x -= math.floor(wall_x)
+
+        tex_x = int(wall_x * TEXTURE_SIZE)
+        if (side == 0 and ray_dir[0] > 0) or (side == 1 and ray_dir[1] < 0):
+            tex_x = TEXTURE_SIZE - tex_x - 1
+        tex_x = min(max(tex_x, 0), TEXTURE_SIZE - 1)
+
+        # Copy pre-shaded raw texels into draw_start..draw_end, sampled along the whole strip
+        # so that a strip cut off by the screen edge shows only part of the texture
+        fog = self.atlas.fog_level(wall_dist)
+        skip = draw_start - (-line_height // 2 + SCREEN_HEIGHT // 2)
+        if frame is None:
+            frame = pygame.surfarray.pixels2d(self.screen)
+        column = self.wall_texels[texture, side, fog, tex_x]
+        frame[x, draw_start:draw_end + 1] = column[texture_rows(line_height, skip, draw_end - draw_start + 1)]
+
+        return steps, saved
+
+    def draw_hint(self, player_pos, player_angle):
+        """Draw an arrow towards the next cell on the shortest route and the cells left"""
+        step = self.exit_field.hint(player_pos)
+        if step is None:
+            return
+        # Aim at the centre of the next cell, relative to the view: straight up is ahead
+        target_x = int(player_pos[0]) + step[0] + 0.5
+        target_y = int(player_pos[1]) + step[1] + 0.5
+        angle = math.atan2(target_y - player_pos[1], target_x - player_pos[0]) - player_angle
+        forward = (math.sin(angle), -math.cos(angle))
+        across = (-forward[1], forward[0])
+        cx, cy = SCREEN_WIDTH // 2, 50
+        tip = (cx + forward[0] * 24, cy + forward[1] * 24)
+        left = (cx - forward[0] * 16 + across[0] * 14, cy - forward[1] * 16 + across[1] * 14)
+        right = (cx - forward[0] * 16 - across[0] * 14, cy - forward[1] * 16 - across[1] * 14)
+        pygame.draw.polygon(self.screen, HINT_COLOR, (tip, left, right))
+
+        remaining = self.exit_field.distance_from(player_pos)
+        text_surface = self.text_surface(f"{remaining} to exit", 'timestamp', HINT_COLOR)
+        self.screen.blit(text_surface, text_surface.get_rect(midtop=(cx, cy + 30)))
+
+    def draw_depth(self, player_pos):
+        """Draw how many cell rows deep the player is in an endless maze"""
+        text_surface = self.text_surface(f"Depth {int(player_pos[1]) // 2}", 'small', (255, 255, 255))
+        self.screen.blit(text_surface, text_surface.get_rect(topright=(SCREEN_WIDTH - 10, 10)))
 
     def draw_minimap(self, maze, player_pos, player_angle):
         """Draw minimap in the corner"""
-        minimap_size = 100
-        cell_size = minimap_size // len(maze)
-
-        minimap = pygame.Surface((minimap_size, minimap_size))
-        minimap.set_alpha(128)
-        minimap.fill((0, 0, 0))
-
-        # Draw maze walls
-        for y in range(len(maze)):
-            for x in range(len(maze[0])):
-                if maze[y][x] == 1:
-                    pygame.draw.rect(minimap, (255, 255, 255),
-                                     (x * cell_size, y * cell_size,
-                                      cell_size, cell_size))
-                # Draw exit
-                elif x == len(maze[0]) - 2 and y == len(maze) - 2:
-                    pygame.draw.rect(minimap, (255, 0, 0),
-                                     (x * cell_size, y * cell_size,
-                                      cell_size, cell_size))
-
-        # Draw player
-        player_x = int(player_pos[0] * cell_size)
-        player_y = int(player_pos[1] * cell_size)
-        pygame.draw.circle(minimap, (0, 255, 0), (player_x, player_y), 2)
-
-        # Draw player direction
-        end_pos = (int(player_x + math.cos(player_angle) * 8),
-                   int(player_y + math.sin(player_angle) * 8))
-        pygame.draw.line(minimap, (0, 255, 0),
-                         (player_x, player_y), end_pos, 1)
-
-        self.screen.blit(minimap, (10, 10))
+        if self.minimap is None:
+            if isinstance(maze, EndlessMaze):
+                self.minimap = StreamingMinimap(maze)
+            else:
+                self.minimap = Minimap(self.maze_grid(maze))
+        self.minimap.draw(self.screen, player_pos, player_angle)
 
     def display_first_person_view(self, maze):
         """Display first-person view of the maze"""
-        player_pos = [1.5, 1.5]
-        player_angle = 0
+        self.maze_grid(maze)
+        optimal_length = self.exit_field.distance_from(START_POS) if self.exit_field is not None else None
+        self.sim = MazeSimulation(maze, self.difficulty, optimal_length)
+        self.recorder = RunRecorder()
         keys = {'left': False, 'right': False, 'up': False, 'down': False}
-        map_press_count = 0
+
+        self.view_key = None
+        self.idle_frames = 0
+        tick = 1 / SIM_TICK_RATE
+        accumulator = 0.0
+        last_poll = time.perf_counter()
 
         running = True
         while running:
-            for event in pygame.event.get():
+            self.profiler.begin_frame()
+            events = pygame.event.get()
+            if not events and self.idle_frames >= IDLE_AFTER_FRAMES:
+                # Nothing on screen is changing: sleep until input arrives, or until the
+                # map's countdown next steps
+                timeout = 1000 // IDLE_FPS
+                if self.map_view_end is not None:
+                    timeout = min(timeout, int((self.map_view_end - time.perf_counter()) % 1 * 1000) + 1)
+                event = pygame.event.wait(timeout)
+                if event.type != pygame.NOEVENT:
+                    events = [event]
+            # The frame's work starts once any wait for input is over
+            frame_start = time.perf_counter()
+            if events:
+                # Input may change the view from the next tick on: don't sleep through it
+                self.idle_frames = 0
+            self.profiler.mark('events')
+
+            # Run the fixed-rate ticks covering the time since the last poll, with
+            # the keys that were held during it; new events apply from now on. The
+            # player stays put while the map is up
+            now = time.perf_counter()
+            if self.map_view_end is None:
+                accumulator += min(now - last_poll, MAX_FRAME_TIME)
+            elif now >= self.map_view_end:
+                self.map_view_end = None
+            last_poll = now
+            action = keys_to_action(keys)
+            while accumulator >= tick:
+                accumulator -= tick
+                self.recorder.record(action)
+                if self.sim.step(action):
+                    break
+            self.profiler.mark('update')
+
+            for event in events:
                 if event.type == pygame.QUIT:
                     return None
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.view_key = None
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
+                    if event.key == pygame.K_F3:
+                        self.profiler.toggle()
+                    elif event.key == pygame.K_SPACE:
                         self.state = GameState.MENU
                         self.show_minimap = False
+                        self.show_hints = False
+                        self.map_view_end = None
                         self.top_view_counts = 0
                         return 0
                     elif event.key == pygame.K_LEFT:
@@ -509,14 +702,17 @@ class Game:
                         keys['up'] = True
                     elif event.key == pygame.K_DOWN:
                         keys['down'] = True
-                    elif event.key == pygame.K_m:
-                        map_press_count += 1
-                        if self.top_view_counts < DIFFICULTY_SETTINGS[self.difficulty]['top_view_allowed']:
-                            self.display_top_view(maze, 2, player_pos, player_angle)
-                            self.top_view_counts += 1
-                        if map_press_count > DIFFICULTY_SETTINGS[self.difficulty]['top_view_allowed']:
-                            # Enable minimap on the third press (after using both map views)
-                            self.show_minimap = True
+                    elif event.key == pygame.K_m and self.map_view_end is None:
+                        self.recorder.event(EVENT_MAP)
+                        if self.sim.press_map():
+                            # Shown by this loop, which keeps reading events while the map is up
+                            self.map_view_end = time.perf_counter() + MAP_VIEW_TIME
+                        self.top_view_counts = self.sim.top_view_counts
+                        self.show_minimap = self.sim.show_minimap
+                    elif event.key == pygame.K_h and self.exit_field is not None:
+                        self.recorder.event(EVENT_HINTS)
+                        self.sim.toggle_hints()
+                        self.show_hints = self.sim.show_hints
                 elif event.type == pygame.KEYUP:
                     if event.key == pygame.K_LEFT:
                         keys['left'] = False
@@ -527,129 +723,183 @@ class Game:
                     elif event.key == pygame.K_DOWN:
                         keys['down'] = False
 
-            # Update player position and angle
-            if keys['left']: player_angle -= ROTATION_SPEED
-            if keys['right']: player_angle += ROTATION_SPEED
-
-            new_pos = list(player_pos)
-            if keys['up']:
-                new_pos[0] += math.cos(player_angle) * PLAYER_SPEED
-                new_pos[1] += math.sin(player_angle) * PLAYER_SPEED
-            if keys['down']:
-                new_pos[0] -= math.cos(player_angle) * PLAYER_SPEED
-                new_pos[1] -= math.sin(player_angle) * PLAYER_SPEED
-
-            # Collision detection
-            if (len(maze) > int(new_pos[1]) >= 0 == maze[int(new_pos[1])][int(new_pos[0])] and
-                    0 <= int(new_pos[0]) < len(maze[0])):
-                player_pos = new_pos
-
-            # Render frame
-            self.render_frame(player_pos, player_angle, maze)
+            self.profiler.mark('events')
 
-            # Draw minimap if enabled
-            if self.show_minimap:
-                self.draw_minimap(maze, player_pos, player_angle)
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            if INTERPOLATE_POSE:
+                player_pos, player_angle = self.sim.interpolated_pose(accumulator / tick)
+            else:
+                player_pos, player_angle = self.sim.player_pos, self.sim.player_angle
+
+            # The screen still holds the last frame: redraw only when its inputs change
+            countdown = self.map_countdown()
+            view_key = self.first_person_view_key(player_pos, player_angle, countdown)
+            self.profiler.count('cached', int(view_key == self.view_key))
+            if view_key != self.view_key:
+                self.view_key = view_key
+                self.idle_frames = 0
+
+                if countdown is not None:
+                    # The map overlay, from the cached map surface
+                    self.draw_top_view(maze, countdown, player_pos, player_angle)
+                    self.profiler.mark('map')
+                else:
+                    # Render frame
+                    self.render_frame(player_pos, player_angle, maze)
+
+                    # Draw minimap if enabled
+                    if self.show_minimap:
+                        self.draw_minimap(maze, player_pos, player_angle)
+                        self.profiler.mark('minimap')
+
+                    if self.show_hints:
+                        self.draw_hint(player_pos, player_angle)
+
+                    if isinstance(maze, EndlessMaze):
+                        self.draw_depth(player_pos)
+
+                # Draw the profiler HUD if enabled (F3)
+                self.profiler.draw(self.screen, self.assets['hud_font'])
+                self.profiler.mark('hud')
+
+                pygame.display.flip()
+                self.profiler.mark('flip')
+                if self.resolution is not None and countdown is None:
+                    # Adapt to the work done rendering this frame, not the time spent waiting
+                    # for input or in tick, nor to map overlay frames, which it does not scale
+                    self.resolution.update((time.perf_counter() - frame_start) * 1000)
+            else:
+                self.idle_frames += 1
+            self.clock.tick(RENDER_FPS)
+            self.profiler.mark('wait')
+            self.profiler.end_frame()
 
             # Check if player reached the exit
-            if (int(player_pos[0]) == len(maze[0]) - 2 and
-                    int(player_pos[1]) == len(maze) - 2):
+            if self.sim.at_exit():
                 elapsed_time = time.time() - self.start_time
-                self.save_high_score()
+                self.save_high_score(elapsed_time)
                 return elapsed_time
 
+    def first_person_view_key(self, player_pos, player_angle, countdown=None):
+        """Everything the composed frame depends on; countdown is the map overlay's, if it is up"""
+        scale = self.resolution.scale if self.resolution is not None else 1.0
+        # With the HUD on, redraw whenever its text is due for a refresh
+        hud = self.profiler.enabled and self.profiler.frame_index // HUD_REFRESH_FRAMES
+        return (player_pos[0], player_pos[1], player_angle, self.show_minimap, self.show_hints,
+                self.renderer, scale, hud, countdown)
+
     def load_high_scores(self):
-        """Load high scores from file"""
+        """Open the leaderboard, importing the old high_scores.json on first use"""
+        self.leaderboard = Leaderboard(LEADERBOARD_PATH, LEGACY_HIGH_SCORES)
+
+    def save_high_score(self, elapsed_time):
+        """Record the finished run; the write happens on the leaderboard's thread"""
+        self.score = self.calculate_score(elapsed_time)
+        self.leaderboard.record(self.difficulty, self.score, elapsed_time, self.top_view_counts,
+                                self.show_minimap, self.maze_seed)
+        self.save_replay(elapsed_time)
+
+    def save_replay(self, elapsed_time):
+        """Write the finished run's input recording to REPLAY_DIR for replay.py"""
+        if REPLAY_DIR is None or self.recorder is None:
+            return
+        algorithm = self.maze_file.algorithm if self.maze_file is not None else MAZE_ALGORITHM
+        name = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{self.difficulty}-{self.maze_seed}.mmr"
         try:
-            with open('high_scores.json', 'r') as f:
-                self.high_scores = json.load(f)
-        except:
-            self.high_scores = {'Easy': float('inf'), 'Medium': float('inf'), 'Hard': float('inf')}
-
-    def save_high_score(self):
-        """Save high score if it's better than previous"""
-        score = self.calculate_score()
-        if score < self.high_scores.get(self.difficulty, float('inf')):
-            self.high_scores[self.difficulty] = score
-            with open('high_scores.json', 'w') as f:
-                json.dump(self.high_scores, f)
-
-    def calculate_score(self):
-        """
-        Calculate score based on:
-        - Base score: 1000 points (reduced from 10000)
-        - Time penalty: Points decrease as time increases
-        - Map view penalty: Each map view reduces score
-        - Minimap penalty: Using permanent minimap reduces score
-        - Difficulty multiplier: Higher difficulties give better scores
-        """
-        # Base score
-        base_score = 1000
-
-        # Time penalty
-        elapsed_time = time.time() - self.start_time
-        time_penalty = elapsed_time * 2  # Lose 2 points per second
-
-        # Map view penalty
-        map_penalty = self.top_view_counts * 100  # Lose 100 points per map view
-
-        # Minimap penalty
-        minimap_penalty = 200 if self.show_minimap else 0  # Flat penalty for using permanent minimap
-
-        # Calculate raw score
-        raw_score = base_score - time_penalty - map_penalty - minimap_penalty
-
-        # Apply difficulty multiplier
-        difficulty_multiplier = DIFFICULTY_SETTINGS[self.difficulty]['score_multiplier']
-        final_score = max(0, raw_score) * difficulty_multiplier
-
-        return round(final_score, 2)
-
-    def draw_text(self, text, size, x, y, color=(255, 255, 255)):
-        """Draw text on screen"""
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            self.recorder.save(os.path.join(REPLAY_DIR, name), self.difficulty, algorithm, self.maze_seed,
+                               self.grid, elapsed_time, self.score)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not save the replay of this run: {e}")
+
+    def calculate_score(self, elapsed_time=None):
+        """Calculate the score for the current run (see simulation.calculate_score)"""
+        if elapsed_time is None:
+            elapsed_time = time.time() - self.start_time
+        efficiency = self.sim.efficiency() if self.sim is not None else 1.0
+        used_hints = self.sim is not None and self.sim.used_hints
+        return calculate_score(elapsed_time, self.top_view_counts, self.show_minimap, self.difficulty,
+                               efficiency, used_hints)
+
+    def close(self):
+        """Stop background work and flush everything that persists between runs"""
+        if self.maze_pool is not None:
+            self.maze_pool.close()
+        if self.raycaster is not None:
+            self.raycaster.close()
+        for raycaster, _ in self.scaled_raycasters.values():
+            raycaster.close()
+        self.profiler.close()
+        self.leaderboard.close()
+        self.assets.close()
+
+    def text_surface(self, text, size, color=(255, 255, 255)):
+        """Rendered text for a font size name, from the text cache"""
         if size == 'large':
             font = self.assets['font']
         elif size == 'medium':
             font = self.assets['medium_font']
+        elif size == 'timestamp':
+            font = self.assets['timestamp_font']
         else:  # small
             font = self.assets['small_font']
+        return self.text_cache.get(font, size, text, color)
 
-        text_surface = font.render(text, True, color)
+    def draw_text(self, text, size, x, y, color=(255, 255, 255)):
+        """Draw text on screen"""
+        text_surface = self.text_surface(text, size, color)
         text_rect = text_surface.get_rect(center=(x, y))
         self.screen.blit(text_surface, text_rect)
 
-def main():
+    def wait_events(self):
+        """Block until input arrives, then return every queued event"""
+        events = [pygame.event.wait()] + pygame.event.get()
+        if any(event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED) for event in events):
+            self.drawn_state = None  # the window needs repainting
+        return events
+
+def main(maze_path=None):
     game = Game()
+    if maze_path is not None:
+        # Play a saved maze file (see mazefile.py) on every difficulty
+        game.maze_file = load_maze(maze_path)
     running = True
 
     while running:
+        # Static screens are drawn once per visit; the loop then sleeps until an event arrives
         if game.state == GameState.MENU:
-            game.draw_menu()
+            if game.drawn_state != game.state:
+                game.draw_menu()
+                game.drawn_state = game.state
             running = game.handle_menu_input()
         elif game.state == GameState.INSTRUCTIONS:
-            game.draw_instructions()
+            if game.drawn_state != game.state:
+                game.draw_instructions()
+                game.drawn_state = game.state
             running = game.handle_menu_input()
         elif game.state == GameState.PLAYING:
+            game.drawn_state = None
             elapsed_time = game.display_first_person_view(game.maze)
             if elapsed_time is None:
                 running = False
             else:
                 game.display_game_over(elapsed_time)
-                game.state = GameState.GAME_OVER
+                game.state = game.drawn_state = GameState.GAME_OVER
         elif game.state == GameState.GAME_OVER:
-            for event in pygame.event.get():
+            if game.drawn_state != game.state:
+                # Repaint after an expose with the screen as it was
+                pygame.display.flip()
+                game.drawn_state = game.state
+            for event in game.wait_events():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     game.state = GameState.MENU
 
+    game.close()
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
 
 
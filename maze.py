@@ -0,0 +1,212 @@
+import itertools
+
+import numpy as np
+
+WALL = 1
+PATH = 0
+
+# Every ordering of the four directions, so a cell's shuffle is one random index
+_DIRECTION_ORDERS = np.array(list(itertools.permutations(range(4))), dtype=np.int64)
+
+
+def new_grid(width, height):
+    """Return a width x height grid filled with walls"""
+    return np.ones((height, width), dtype=np.uint8)
+
+
+def cell_counts(width, height):
+    """Number of carvable cells (odd coordinates) along each axis"""
+    return width // 2, height // 2
+
+
+def open_exit(grid):
+    """Open the exit cell in the bottom-right corner"""
+    height, width = grid.shape
+    grid[height - 2, width - 2] = PATH
+    return grid
+
+
+def exit_of(maze):
+    """(x, y) of a maze's exit: the cell its maze file records, else the one open_exit opens"""
+    exit_cell = getattr(maze, 'exit_cell', None)
+    if exit_cell is not None:
+        return exit_cell
+    return len(maze[0]) - 2, len(maze) - 2
+
+
+def carve_dfs(width, height, rng):
+    """Randomized depth-first search using an explicit stack"""
+    cols, rows = cell_counts(width, height)
+    grid = new_grid(width, height)
+    if not cols or not rows:
+        return grid
+
+    # Cells live on a lattice padded by one ring of visited sentinels, which
+    # removes all bounds checks from the inner loop
+    stride = cols + 2
+    size = stride * (rows + 2)
+    visited = bytearray(b'\x01') * size
+    for y in range(1, rows + 1):
+        visited[y * stride + 1:y * stride + 1 + cols] = bytes(cols)
+
+    # Each cell's shuffled neighbours sit in four consecutive slots, so a stack
+    # entry is just the slot to try next: slot >> 2 is the cell itself
+    steps = np.array((1, -1, stride, -stride))
+    orders = _DIRECTION_ORDERS[rng.integers(0, len(_DIRECTION_ORDERS), size=size)]
+    neighbours = (np.arange(size)[:, None] + steps[orders]).ravel().tolist()
+
+    start = stride + 1
+    visited[start] = 1
+    parent = [-1] * size
+    stack = [start << 2]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        slot = stack[-1]
+        if slot & 3 == 3:
+            pop()
+        else:
+            stack[-1] = slot + 1
+        nxt = neighbours[slot]
+        if not visited[nxt]:
+            visited[nxt] = 1
+            parent[nxt] = slot >> 2
+            push(nxt << 2)
+
+    # Translate the spanning tree from the padded lattice back to cell indices
+    parent = np.array(parent, dtype=np.int64)
+    child = np.flatnonzero(parent >= 0)
+    edges = np.stack([child, parent[child]], axis=1)
+    edges = (edges // stride - 1) * cols + (edges % stride - 1)
+    _open_passages(grid, cols, edges)
+    return grid
+
+
+def _cell_edges(cols, rows):
+    """Return (a, b) cell-index pairs for every pair of adjacent cells"""
+    index = np.arange(cols * rows).reshape(rows, cols)
+    horizontal = np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1)
+    vertical = np.stack([index[:-1, :].ravel(), index[1:, :].ravel()], axis=1)
+    return np.concatenate([horizontal, vertical])
+
+
+def _open_passages(grid, cols, edges):
+    """Carve the cells and the wall between each (a, b) cell pair"""
+    ay, ax = np.divmod(edges[:, 0], cols)
+    by, bx = np.divmod(edges[:, 1], cols)
+    rows = grid.shape[0] // 2
+    grid[1:2 * rows:2, 1:2 * cols:2] = PATH
+    grid[ay + by + 1, ax + bx + 1] = PATH
+
+
+def carve_kruskal(width, height, rng):
+    """Randomized Kruskal's algorithm over a shuffled edge list"""
+    cols, rows = cell_counts(width, height)
+    grid = new_grid(width, height)
+    if not cols or not rows:
+        return grid
+
+    edges = _cell_edges(cols, rows)
+    edges = edges[rng.permutation(len(edges))]
+    parent = list(range(cols * rows))
+    kept = []
+    for i, a, b in zip(range(len(edges)), edges[:, 0].tolist(), edges[:, 1].tolist()):
+        # Union-find with path halving
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a != b:
+            parent[b] = a
+            kept.append(i)
+
+    _open_passages(grid, cols, edges[kept])
+    return grid
+
+
+def carve_wilson(width, height, rng):
+    """Wilson's algorithm: loop-erased random walks give an unbiased spanning tree"""
+    cols, rows = cell_counts(width, height)
+    grid = new_grid(width, height)
+    if not cols or not rows:
+        return grid
+
+    count = cols * rows
+    in_tree = bytearray(count)
+    in_tree[int(rng.integers(count))] = 1
+    remaining = count - 1
+    heading = [0] * count
+    moves = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    buffer = []
+    edges = []
+
+    order = rng.permutation(count).tolist()
+    for start in order:
+        if in_tree[start]:
+            continue
+        # Random walk until the tree is reached, remembering the last exit from each cell
+        cell = start
+        while not in_tree[cell]:
+            if not buffer:
+                buffer = rng.integers(0, 4, size=65536).tolist()
+            y, x = divmod(cell, cols)
+            dx, dy = moves[buffer.pop()]
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows:
+                nxt = ny * cols + nx
+                heading[cell] = nxt
+                cell = nxt
+
+        # Retrace the walk from its start; loops were erased by the overwrites
+        cell = start
+        while not in_tree[cell]:
+            in_tree[cell] = 1
+            nxt = heading[cell]
+            edges.append((cell, nxt))
+            cell = nxt
+            remaining -= 1
+        if not remaining:
+            break
+
+    _open_passages(grid, cols, np.array(edges, dtype=np.int64).reshape(-1, 2))
+    return grid
+
+
+def carve_binary_tree(width, height, rng):
+    """Binary tree maze: every cell opens north or west, fully vectorized"""
+    cols, rows = cell_counts(width, height)
+    grid = new_grid(width, height)
+    if not cols or not rows:
+        return grid
+
+    ys, xs = np.mgrid[0:rows, 0:cols]
+    north = rng.integers(0, 2, size=(rows, cols)).astype(bool)
+    north[:, 0] = True  # the left column can only open north
+    north[0, :] = False  # the top row can only open west
+    grid[1:2 * rows:2, 1:2 * cols:2] = PATH
+
+    go_north = north & (ys > 0)
+    go_west = ~north & (xs > 0)
+    grid[2 * ys[go_north], 2 * xs[go_north] + 1] = PATH
+    grid[2 * ys[go_west] + 1, 2 * xs[go_west]] = PATH
+    return grid
+
+
+ALGORITHMS = {
+    'dfs': carve_dfs,
+    'kruskal': carve_kruskal,
+    'wilson': carve_wilson,
+    'binary_tree': carve_binary_tree,
+}
+
+
+def generate_maze(width, height, seed=None, algorithm='dfs'):
+    """Generate a maze grid (1 = wall, 0 = path) with the named algorithm"""
+    try:
+        carve = ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown maze algorithm: {algorithm!r}") from None
+    grid = carve(width, height, np.random.default_rng(seed))
+    return open_exit(grid)
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import random
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from constants import DIFFICULTY_SETTINGS, MAZE_ALGORITHM
+from maze import generate_maze
+
+
+def build_maze(size, seed, algorithm):
+    """Worker entry point: generate one maze and return it with its seed"""
+    return seed, generate_maze(size, size, seed, algorithm)
+
+
+class MazePool:
+    """Ready-made mazes per difficulty, refilled in the background by worker processes"""
+
+    def __init__(self, target=3, workers=2, algorithm=MAZE_ALGORITHM, cache_path=None):
+        self.target = target
+        self.algorithm = algorithm
+        self.cache_path = cache_path
+        # Endless mazes are streamed as they are played, so there is nothing to pool
+        fixed = [difficulty for difficulty, settings in DIFFICULTY_SETTINGS.items() if not settings.get('endless')]
+        self.ready = {difficulty: deque() for difficulty in fixed}
+        self.pending = {difficulty: 0 for difficulty in fixed}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refill_times = []
+        self.failures = 0
+
+        if cache_path:
+            self.load(cache_path)
+
+        # spawn keeps SDL state from the game process out of the workers
+        self.executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        for difficulty in self.ready:
+            self.refill(difficulty)
+
+    def refill(self, difficulty):
+        """Queue enough jobs to bring the difficulty back up to target"""
+        size = DIFFICULTY_SETTINGS[difficulty]['maze_size']
+        with self.lock:
+            missing = self.target - len(self.ready[difficulty]) - self.pending[difficulty]
+            self.pending[difficulty] += max(0, missing)
+        for _ in range(missing):
+            submitted = time.perf_counter()
+            future = self.executor.submit(build_maze, size, random.getrandbits(63), self.algorithm)
+            future.add_done_callback(
+                lambda done, difficulty=difficulty, submitted=submitted:
+                    self.store(difficulty, submitted, done))
+
+    def store(self, difficulty, submitted, future):
+        """Collect a finished job (runs on the executor's callback thread)"""
+        with self.lock:
+            self.pending[difficulty] -= 1
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                # Warn on the first failure only; get() still generates inline when the pool runs dry
+                self.failures += 1
+                if self.failures == 1:
+                    print(f"Warning: a maze pool worker failed ({error!r}); mazes may be generated inline")
+                return
+            self.ready[difficulty].append(future.result())
+            self.refill_times.append(time.perf_counter() - submitted)
+
+    def get(self, difficulty):
+        """Return (seed, maze) for difficulty, generating inline only if the pool is empty"""
+        with self.lock:
+            entry = self.ready[difficulty].popleft() if self.ready[difficulty] else None
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            size = DIFFICULTY_SETTINGS[difficulty]['maze_size']
+            entry = build_maze(size, random.getrandbits(63), self.algorithm)
+        self.refill(difficulty)
+        return entry
+
+    def stats(self):
+        """Hit/miss counts and refill latency in seconds"""
+        with self.lock:
+            times = list(self.refill_times)
+            ready = {difficulty: len(mazes) for difficulty, mazes in self.ready.items()}
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'ready': ready,
+            'refills': len(times),
+            'failures': self.failures,
+            'refill_mean': sum(times) / len(times) if times else 0.0,
+            'refill_max': max(times) if times else 0.0,
+        }
+
+    def save(self, path):
+        """Write the ready mazes to disk so the next start can serve them at once"""
+        with self.lock:
+            arrays = {'algorithm': np.array(self.algorithm)}
+            for difficulty, mazes in self.ready.items():
+                if mazes:
+                    arrays[f'{difficulty}_seeds'] = np.array([seed for seed, _ in mazes], dtype=np.int64)
+                    arrays[f'{difficulty}_mazes'] = np.stack([grid for _, grid in mazes])
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+
+    def load(self, path):
+        """Fill the pool from a file written by save(); a missing or stale file is ignored"""
+        try:
+            with np.load(path) as data:
+                if str(data['algorithm']) != self.algorithm:
+                    return
+                for difficulty in self.ready:
+                    size = DIFFICULTY_SETTINGS[difficulty]['maze_size']
+                    if f'{difficulty}_seeds' in data:
+                        mazes = data[f'{difficulty}_mazes']
+                        if mazes.shape[1:] == (size, size):
+                            seeds = data[f'{difficulty}_seeds'].tolist()
+                            self.ready[difficulty].extend(zip(seeds, mazes))
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+
+    def close(self):
+        """Stop the workers and persist whatever is ready"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache_path:
+            self.save(self.cache_path)
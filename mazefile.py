@@ -0,0 +1,106 @@
+import mmap
+import struct
+
+import numpy as np
+
+from maze import exit_of
+
+# Header: magic, version, width, height, exit x/y, seed, algorithm name;
+# followed by one bit per cell, row-major, least significant bit first
+MAGIC = b'MMAZ'
+VERSION = 1
+HEADER = struct.Struct('<4sHxxIIIIq16s')
+
+
+def save_maze(path, grid, seed=0, algorithm='dfs'):
+    """Write grid (1 = wall) to path in the bit-packed maze format"""
+    exit_x, exit_y = exit_of(grid)
+    grid = np.asarray(grid)
+    height, width = grid.shape
+    header = HEADER.pack(MAGIC, VERSION, width, height, exit_x, exit_y,
+                         seed, algorithm.encode('ascii')[:16])
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(np.packbits(grid.ravel() != 0, bitorder='little').tobytes())
+
+
+def load_maze(path):
+    """Memory-map a maze file; cells are read from the mapping on demand"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, width, height, exit_x, exit_y, seed, algorithm = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        raise ValueError(f"{path} is not a MemoMaze maze file")
+    if len(buffer) < HEADER.size + (width * height + 7) // 8:
+        buffer.close()
+        raise ValueError(f"{path} is truncated")
+    return PackedMaze(buffer, width, height, (exit_x, exit_y), seed,
+                      algorithm.rstrip(b'\0').decode('ascii'))
+
+
+class PackedMaze:
+    """Read-only maze backed by a memory-mapped bit array
+
+    Supports the same access patterns as the uint8 grids: maze[y][x],
+    len(maze), .shape, array indexing maze[ys, xs] and np.asarray(maze).
+    """
+
+    def __init__(self, buffer, width, height, exit_cell, seed, algorithm):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.shape = (height, width)
+        self.exit_cell = exit_cell
+        self.seed = seed
+        self.algorithm = algorithm
+        self.bits = np.frombuffer(buffer, dtype=np.uint8, offset=HEADER.size,
+                                  count=(width * height + 7) // 8)
+        # Made once so maze[y][x] in the DDA loop allocates nothing
+        self.rows = [PackedRow(self, y) for y in range(height)]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            y, x = key
+            if isinstance(y, int) and isinstance(x, int):
+                return self.cell(y, x)
+            index = np.asarray(y, dtype=np.int64) * self.width + x
+            return (self.bits[index >> 3] >> (index & 7)) & 1
+        return self.rows[key]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def cell(self, y, x):
+        """Value of a single cell, read straight from the mapping"""
+        index = y * self.width + x
+        return (self.buffer[HEADER.size + (index >> 3)] >> (index & 7)) & 1
+
+    def __array__(self, dtype=None, copy=None):
+        grid = np.unpackbits(self.bits, count=self.width * self.height, bitorder='little')
+        grid = grid.reshape(self.shape)
+        return grid if dtype is None else grid.astype(dtype, copy=False)
+
+    def close(self):
+        """Release the mapping"""
+        self.bits = self.rows = None
+        self.buffer.close()
+
+
+class PackedRow:
+    """One row of a PackedMaze, so maze[y][x] works like it does on lists"""
+
+    def __init__(self, maze, y):
+        self.maze = maze
+        self.y = y
+
+    def __len__(self):
+        return self.maze.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.maze.width
+        return self.maze.cell(self.y, x)
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+import pygame
+
+from constants import WALL_COLOR
+from maze import exit_of
+
+PATH_COLOR = (255, 255, 255)
+EXIT_COLOR = (255, 0, 0)
+
+
+def maze_surface(grid, cell_size, path_color=PATH_COLOR, wall_color=WALL_COLOR, exit_color=EXIT_COLOR,
+                 exit_cell=None):
+    """Rasterize a maze grid into a surface with cell_size pixels per cell
+
+    exit_cell is the (x, y) of the exit within grid, by default the maze's
+    own (maze.exit_of); an exit outside a cut-out window is not drawn.
+    """
+    height, width = grid.shape
+    pixels = np.where(grid[:, :, None] == 0, np.array(path_color, dtype=np.uint8),
+                      np.array(wall_color, dtype=np.uint8))
+    exit_x, exit_y = exit_cell if exit_cell is not None else exit_of(grid)
+    if 0 <= exit_x < width and 0 <= exit_y < height and grid[exit_y, exit_x] == 0:
+        pixels[exit_y, exit_x] = exit_color
+
+    # surfarray is indexed (x, y); an integer scale factor keeps cells crisp
+    surface = pygame.surfarray.make_surface(pixels.transpose(1, 0, 2))
+    return pygame.transform.scale(surface, (width * cell_size, height * cell_size))
+
+
+class Minimap:
+    """Minimap of a maze, rasterizing only a block of cells around the player
+
+    A maze that fits in the block is rasterized once. On a larger one the
+    block is rebuilt when the window nears its edge, so the layer stays the
+    same size however large the maze is.
+    """
+
+    exit_color = EXIT_COLOR
+
+    def __init__(self, grid, size=100, min_cell_size=2, alpha=128):
+        self.grid = grid
+        self.size = size
+        self.cell_size = max(min_cell_size, size // self.fitted_cells())
+        self.visible = size // self.cell_size + 2
+        self.block = 3 * self.visible
+        self.origin = None  # (column, row) of the maze cell at the layer's top left
+        self.layer = None
+        self.window = pygame.Surface((size, size))
+        self.window.set_alpha(alpha)
+
+    def fitted_cells(self):
+        """Cells the minimap scales to fit in its window, when the cell size allows"""
+        return max(self.grid.shape)
+
+    def cells(self, left, top, cols, rows):
+        """Cells of the block with the given top-left cell and size, and the exit's (x, y) in it"""
+        exit_x, exit_y = exit_of(self.grid)
+        cells = self.grid[np.arange(top, top + rows)[:, None], np.arange(left, left + cols)[None, :]]
+        return cells, (exit_x - left, exit_y - top)
+
+    def refresh(self, player_pos):
+        """Rasterize the block again if it no longer covers the cells around the player"""
+        height, width = self.grid.shape
+        cols, rows = min(self.block, width), min(self.block, height)
+        first_col = int(player_pos[0]) - self.visible // 2
+        first_row = int(player_pos[1]) - self.visible // 2
+        if self.origin is not None:
+            origin_x, origin_y = self.origin
+            if (origin_x <= max(first_col, 0) and min(first_col + self.visible, width) <= origin_x + cols and
+                    origin_y <= max(first_row, 0) and min(first_row + self.visible, height) <= origin_y + rows):
+                return
+        left = min(max(0, first_col - self.visible), width - cols)
+        top = min(max(0, first_row - self.visible), height - rows)
+        cells, exit_cell = self.cells(left, top, cols, rows)
+        block = maze_surface(cells, self.cell_size, path_color=(0, 0, 0), wall_color=(255, 255, 255),
+                             exit_color=self.exit_color, exit_cell=exit_cell)
+
+        # Pad the layer to at least one window so small mazes sit on black
+        self.layer = pygame.Surface((max(self.size, block.get_width()), max(self.size, block.get_height())))
+        self.layer.fill((0, 0, 0))
+        self.layer.blit(block, (0, 0))
+        self.origin = (left, top)
+
+    def viewport(self, player_pos):
+        """Top-left corner of the window in maze pixels, centred on the player and clamped to the maze"""
+        self.refresh(player_pos)
+        height, width = self.grid.shape
+        left = int(player_pos[0] * self.cell_size) - self.size // 2
+        top = int(player_pos[1] * self.cell_size) - self.size // 2
+        left = min(max(left, 0), max(0, width * self.cell_size - self.size))
+        top = min(max(top, 0), max(0, height * self.cell_size - self.size))
+        return left, top
+
+    def draw(self, screen, player_pos, player_angle, position=(10, 10)):
+        """Blit the visible part of the minimap with the player marker"""
+        left, top = self.viewport(player_pos)
+        origin_x, origin_y = self.origin
+        self.window.blit(self.layer, (0, 0), (left - origin_x * self.cell_size, top - origin_y * self.cell_size,
+                                              self.size, self.size))
+
+        # Draw player
+        player_x = int(player_pos[0] * self.cell_size) - left
+        player_y = int(player_pos[1] * self.cell_size) - top
+        pygame.draw.circle(self.window, (0, 255, 0), (player_x, player_y), 2)
+
+        # Draw player direction
+        end_pos = (int(player_x + math.cos(player_angle) * 8),
+                   int(player_y + math.sin(player_angle) * 8))
+        pygame.draw.line(self.window, (0, 255, 0), (player_x, player_y), end_pos, 1)
+
+        screen.blit(self.window, position)
+
+
+class StreamingMinimap(Minimap):
+    """Minimap for an EndlessMaze, whose blocks are read through the maze's chunk cache
+
+    The minimap scales to the maze's width and marks no exit, as there is none.
+    """
+
+    exit_color = (0, 0, 0)
+
+    def fitted_cells(self):
+        """Cells across the maze, as its depth is unbounded"""
+        return self.grid.width
+
+    def cells(self, left, top, cols, rows):
+        """Cells of the block, read a band of whole rows at a time"""
+        return self.grid.region(top, rows)[:, left:left + cols], None
@@ -0,0 +1,119 @@
+import numpy as np
+
+from maze import exit_of
+
+# Next-step codes stored in ExitField.step, as (dx, dy) cell offsets
+STEPS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+NO_STEP = 255  # walls, unreachable cells and the exit itself
+
+
+def exit_distances(grid, goal=None):
+    """Steps from every cell to goal (default: the exit cell), -1 where it can't be reached
+
+    A single breadth-first search outward from goal. Each BFS level is a
+    plain list of flat cell indices and walls start out marked as visited,
+    so the inner loop is one list lookup per neighbour.
+    """
+    goal_x, goal_y = goal if goal is not None else exit_of(grid)
+    grid = np.asarray(grid, dtype=np.uint8)
+    height, width = grid.shape
+    if grid[goal_y, goal_x] != 0:
+        return np.full((height, width), -1, dtype=np.int32)
+
+    # A border of walls keeps every neighbour index inside the grid and on the same row
+    stride = width + 2
+    padded = np.ones((height + 2, stride), dtype=np.uint8)
+    padded[1:-1, 1:-1] = grid
+    distance = np.where(padded.ravel() == 0, -1, -2).tolist()
+
+    start = (goal_y + 1) * stride + goal_x + 1
+    distance[start] = 0
+    frontier = [start]
+    level = 0
+    while frontier:
+        level += 1
+        reached = []
+        push = reached.append
+        for cell in frontier:
+            # Unrolled: this loop visits every open cell of the maze
+            if distance[cell + 1] == -1:
+                distance[cell + 1] = level
+                push(cell + 1)
+            if distance[cell - 1] == -1:
+                distance[cell - 1] = level
+                push(cell - 1)
+            if distance[cell + stride] == -1:
+                distance[cell + stride] = level
+                push(cell + stride)
+            if distance[cell - stride] == -1:
+                distance[cell - stride] = level
+                push(cell - stride)
+        frontier = reached
+
+    distance = np.fromiter(distance, dtype=np.int32, count=len(distance)).reshape(height + 2, stride)[1:-1, 1:-1]
+    return np.maximum(distance, -1)
+
+
+def next_steps(distance):
+    """STEPS code of the neighbour one step closer to the exit, for every cell"""
+    height, width = distance.shape
+    padded = np.full((height + 2, width + 2), -1, dtype=np.int32)
+    padded[1:-1, 1:-1] = distance
+    steps = np.full((height, width), NO_STEP, dtype=np.uint8)
+    closer = np.where(distance > 0, distance - 1, -2)
+    for code, (dx, dy) in enumerate(STEPS):
+        neighbour = padded[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+        steps[neighbour == closer] = code
+    return steps
+
+
+class ExitField:
+    """Shortest routes to the exit from every cell of one maze
+
+    Built by one BFS from the exit when a maze is loaded; after that a hint,
+    a remaining distance or the optimal route length is an array lookup.
+    distance is int32 (-1 for walls and cells cut off from the exit) and
+    step holds one STEPS code per cell as uint8.
+    """
+
+    def __init__(self, grid, goal=None):
+        self.distance = exit_distances(grid, goal)
+        self.step = next_steps(self.distance)
+        self.last_route = None
+
+    def cell(self, pos):
+        """The (x, y) cell containing pos, or None outside the maze"""
+        x, y = int(pos[0]), int(pos[1])
+        height, width = self.distance.shape
+        return (x, y) if 0 <= x < width and 0 <= y < height else None
+
+    def distance_from(self, pos):
+        """Cells left to walk from pos to the exit, or -1 if there is no route"""
+        cell = self.cell(pos)
+        return -1 if cell is None else int(self.distance[cell[1], cell[0]])
+
+    def hint(self, pos):
+        """(dx, dy) towards the next cell on the shortest route, or None at the exit or off it"""
+        cell = self.cell(pos)
+        if cell is None:
+            return None
+        code = self.step[cell[1], cell[0]]
+        return None if code == NO_STEP else STEPS[code]
+
+    def route(self, pos):
+        """Cells of the shortest route from pos to the exit, both included"""
+        cell = self.cell(pos)
+        if self.last_route is not None and self.last_route[0] == cell:
+            return self.last_route[1]
+        route = []
+        if cell is not None and self.distance[cell[1], cell[0]] >= 0:
+            x, y = cell
+            route.append(cell)
+            code = self.step[y, x]
+            while code != NO_STEP:
+                dx, dy = STEPS[code]
+                x, y = x + dx, y + dy
+                route.append((x, y))
+                code = self.step[y, x]
+        self.last_route = (cell, route)
+        return route
@@ -0,0 +1,139 @@
+import json
+import time
+from collections import deque
+
+HUD_REFRESH_FRAMES = 15  # Re-render the HUD text every this many frames
+
+
+class FrameProfiler:
+    """Low-overhead per-stage frame timer with a rolling HUD and optional log file
+
+    Call begin_frame(), then mark(stage) after each stage of the frame: the
+    time since the previous mark is charged to that stage. count() adds to
+    per-frame counters such as rays and DDA steps. While disabled every call
+    returns immediately.
+    """
+
+    def __init__(self, window=120, log_path=None):
+        self.enabled = False
+        self.window = window
+        self.frames = deque(maxlen=window)
+        self.stages = {}
+        self.counters = {}
+        self.last = 0.0
+        self.frame_start = 0.0
+        self.frame_index = 0
+        self.hud_surfaces = []
+        self.log_path = log_path
+        self.log = None
+
+    def toggle(self):
+        """Switch profiling on or off"""
+        self.enabled = not self.enabled
+        self.frames.clear()
+        self.frame_start = self.last = time.perf_counter()
+        self.hud_surfaces = []
+        if self.enabled and self.log_path and self.log is None:
+            self.open_log()
+
+    def begin_frame(self):
+        """Start timing a new frame"""
+        if not self.enabled:
+            return
+        self.stages = {}
+        self.counters = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def mark(self, stage):
+        """Charge the time since the previous mark to stage"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def count(self, counter, amount):
+        """Add amount to a per-frame counter"""
+        if not self.enabled:
+            return
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def end_frame(self):
+        """Finish the frame and add it to the rolling window"""
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.frame_start
+        self.frames.append((total, self.stages, self.counters))
+        if self.log is not None:
+            self.write_frame(total)
+        self.frame_index += 1
+
+    def summary(self):
+        """Rolling means: (fps, {stage: ms}, {counter: per frame that recorded it})"""
+        if not self.frames:
+            return 0.0, {}, {}
+        count = len(self.frames)
+        total = sum(frame[0] for frame in self.frames)
+        stages, counters, counted = {}, {}, {}
+        for _, frame_stages, frame_counters in self.frames:
+            for stage, seconds in frame_stages.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            for counter, amount in frame_counters.items():
+                counters[counter] = counters.get(counter, 0) + amount
+                counted[counter] = counted.get(counter, 0) + 1
+        stages = {stage: seconds * 1000 / count for stage, seconds in stages.items()}
+        # Frames served from the view cache record no render counters, so they don't dilute them
+        counters = {counter: amount / counted[counter] for counter, amount in counters.items()}
+        return count / total if total else 0.0, stages, counters
+
+    def draw(self, screen, font, position=(10, 120)):
+        """Draw the HUD, refreshing its text every HUD_REFRESH_FRAMES frames"""
+        if not self.enabled:
+            return
+        if not self.hud_surfaces or self.frame_index % HUD_REFRESH_FRAMES == 0:
+            fps, stages, counters = self.summary()
+            lines = [f"{fps:5.1f} fps  {sum(stages.values()):6.2f} ms"]
+            lines += [f"{stage:<9}{ms:6.2f} ms" for stage, ms in stages.items()]
+            lines += [f"{counter:<9}{amount:8.0f}" for counter, amount in counters.items()]
+            self.hud_surfaces = [font.render(line, True, (255, 255, 0), (0, 0, 0)) for line in lines]
+
+        x, y = position
+        for surface in self.hud_surfaces:
+            screen.blit(surface, (x, y))
+            y += surface.get_height()
+
+    def open_log(self):
+        """Start the log file: CSV rows per frame, or a Chrome trace for .json paths"""
+        self.log = open(self.log_path, 'w')
+        if self.log_path.endswith('.json'):
+            self.log.write('[\n')  # the closing bracket is optional in the trace format
+        else:
+            self.log.write('frame,kind,name,value\n')
+
+    def write_frame(self, total):
+        """Append the finished frame to the log file"""
+        if self.log_path.endswith('.json'):
+            # One complete event per stage, laid end to end on the frame's timeline
+            ts = self.frame_start * 1e6
+            events = [{'name': 'frame', 'ph': 'X', 'ts': ts, 'dur': total * 1e6,
+                       'pid': 1, 'tid': 1, 'args': self.counters}]
+            for stage, seconds in self.stages.items():
+                events.append({'name': stage, 'ph': 'X', 'ts': ts, 'dur': seconds * 1e6,
+                               'pid': 1, 'tid': 2})
+                ts += seconds * 1e6
+            self.log.write(''.join(json.dumps(event) + ',\n' for event in events))
+            return
+
+        # Long format keeps the columns fixed even when stages come and go
+        rows = [f'{self.frame_index},frame,total,{total * 1000:.3f}']
+        rows += [f'{self.frame_index},stage,{stage},{seconds * 1000:.3f}'
+                 for stage, seconds in self.stages.items()]
+        rows += [f'{self.frame_index},counter,{counter},{amount}'
+                 for counter, amount in self.counters.items()]
+        self.log.write('\n'.join(rows) + '\n')
+
+    def close(self):
+        """Flush and close the log file"""
+        if self.log is not None:
+            self.log.close()
+            self.log = None
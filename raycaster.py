@@ -0,0 +1,423 @@
+import math
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, EPSILON, TEXTURE_SIZE, FOV, FLOOR_COLOR
+from profiler import FrameProfiler
+from textures import map_rgb_array, wall_texture_ids
+
+# Result of a batched cast: one entry per column in every array
+RayHits = namedtuple('RayHits', [
+    'dir_x', 'dir_y', 'map_x', 'map_y', 'side', 'wall_dist',
+    'line_height', 'draw_start', 'draw_end', 'texture', 'tex_x', 'steps', 'saved'
+])
+
+
+def ray_directions(player_angle, columns, screen_width=SCREEN_WIDTH):
+    """Return the ray direction vectors for the given screen columns"""
+    angles = (player_angle - FOV / 2) + (columns / screen_width) * FOV
+    # math.cos/math.sin keep the directions bit-identical to cast_ray
+    dir_x = np.fromiter(map(math.cos, angles.tolist()), dtype=np.float64, count=len(angles))
+    dir_y = np.fromiter(map(math.sin, angles.tolist()), dtype=np.float64, count=len(angles))
+    return dir_x, dir_y
+
+
+def march_rays(is_wall, px, py, dir_x, dir_y, open_run=None):
+    """Step every ray through the grid at once until each one hits a wall
+
+    px/py may be scalars or one value per ray. is_wall(rays, map_x, map_y)
+    reports, for the ray indices still travelling, whether their current
+    cell stops them (walls and out-of-bounds cells alike). Given
+    open_run(rays, map_x, map_y, direction), the open cells ahead of each
+    ray's cell in a STEPS direction (see corridors.corridor_runs), rays
+    read walls from the runs instead and cross straight stretches of a
+    corridor in one step; saved counts the steps those jumps spared.
+    """
+    n = len(dir_x)
+    start_x = np.floor(px).astype(np.int64) if np.ndim(px) else int(px)
+    start_y = np.floor(py).astype(np.int64) if np.ndim(py) else int(py)
+
+    map_x = np.zeros(n, dtype=np.int64) + start_x
+    map_y = np.zeros(n, dtype=np.int64) + start_y
+    delta_x = np.abs(1 / (dir_x + EPSILON))
+    delta_y = np.abs(1 / (dir_y + EPSILON))
+    step_x = np.where(dir_x < 0, -1, 1)
+    step_y = np.where(dir_y < 0, -1, 1)
+    side_x = np.where(dir_x < 0, (px - start_x) * delta_x, (start_x + 1.0 - px) * delta_x)
+    side_y = np.where(dir_y < 0, (py - start_y) * delta_y, (start_y + 1.0 - py) * delta_y)
+    side = np.zeros(n, dtype=np.int64)
+    # STEPS codes of each ray's x and y steps
+    dir_code_x = np.where(dir_x < 0, 2, 0)
+    dir_code_y = np.where(dir_y < 0, 3, 1)
+
+    # Step only the rays that are still travelling until all have hit a wall
+    active = np.arange(n)
+    steps = 0
+    saved = 0
+    while active.size:
+        steps += active.size
+        near_x = side_x[active]
+        near_y = side_y[active]
+        use_x = near_x < near_y
+        if open_run is not None:
+            # The runs stand in for the wall test: a ray whose run is 0 steps into a wall. Any
+            # other ray takes, in one jump, the steps along its axis it makes before turning,
+            # as far as they stay in open cells
+            direction = np.where(use_x, dir_code_x[active], dir_code_y[active])
+            run = open_run(active, map_x[active], map_y[active], direction)
+            gap = np.abs(near_y - near_x)
+            delta = np.where(use_x, delta_x[active], delta_y[active])
+            jump = np.minimum(gap / delta, run).astype(np.int64)
+            # Only a ray two steps or more from turning jumps, as in cast_ray
+            jump[(jump < 1) | (gap < 2 * delta)] = 1
+            saved += int(jump.sum()) - active.size
+            ax = active[use_x]
+            ay = active[~use_x]
+            side_x[ax] += jump[use_x] * delta_x[ax]
+            map_x[ax] += jump[use_x] * step_x[ax]
+            side[ax] = 0
+            side_y[ay] += jump[~use_x] * delta_y[ay]
+            map_y[ay] += jump[~use_x] * step_y[ay]
+            side[ay] = 1
+            active = active[run != 0]
+            continue
+
+        ax = active[use_x]
+        ay = active[~use_x]
+        side_x[ax] += delta_x[ax]
+        map_x[ax] += step_x[ax]
+        side[ax] = 0
+        side_y[ay] += delta_y[ay]
+        map_y[ay] += step_y[ay]
+        side[ay] = 1
+        active = active[~is_wall(active, map_x[active], map_y[active])]
+
+    wall_dist = np.where(side == 0, side_x - delta_x, side_y - delta_y)
+    return map_x, map_y, side, wall_dist, steps, saved
+
+
+def cast_rays(grid, player_pos, dir_x, dir_y, screen_height=SCREEN_HEIGHT, texture_ids=None,
+              corridors=None):
+    """Run the DDA for every ray at once and return the hits as arrays
+
+    texture_ids is the maze's wall_texture_ids grid; pass it in to avoid
+    rebuilding it for every call. corridors, the maze's corridor_runs
+    table, lets rays jump along straight runs of open cells; saved in the
+    result counts the steps those jumps spared.
+    """
+    height, width = grid.shape
+    px, py = player_pos[0], player_pos[1]
+
+    def is_wall(rays, mx, my):
+        hit = (mx < 0) | (mx >= width) | (my < 0) | (my >= height)
+        inside = ~hit
+        hit[inside] = grid[my[inside], mx[inside]] == 1
+        return hit
+
+    open_run = None
+    if corridors is not None:
+        runs = corridors.ravel()
+
+        def open_run(rays, mx, my, direction):
+            # Travelling rays are always in an open cell inside the grid
+            return runs[(direction * height + my) * width + mx]
+
+    map_x, map_y, side, wall_dist, steps, saved = march_rays(is_wall, px, py, dir_x, dir_y, open_run)
+    line_height = (screen_height / (wall_dist + EPSILON)).astype(np.int64)
+    draw_start = np.maximum(0, -line_height // 2 + screen_height // 2)
+    draw_end = np.minimum(screen_height - 1, line_height // 2 + screen_height // 2)
+
+    # One lookup per hit; rays leaving an unwalled grid take the texture of its edge
+    if texture_ids is None:
+        texture_ids = wall_texture_ids(grid)
+    texture = texture_ids[side, np.clip(map_y, 0, height - 1), np.clip(map_x, 0, width - 1)]
+
+    wall_x = np.where(side == 0, py + wall_dist * dir_y, px + wall_dist * dir_x)
+    wall_x -= np.floor(wall_x)
+    tex_x = (wall_x * TEXTURE_SIZE).astype(np.int64)
+    flip = ((side == 0) & (dir_x > 0)) | ((side == 1) & (dir_y < 0))
+    tex_x = np.clip(np.where(flip, TEXTURE_SIZE - tex_x - 1, tex_x), 0, TEXTURE_SIZE - 1)
+
+    return RayHits(dir_x, dir_y, map_x, map_y, side, wall_dist, line_height,
+                   draw_start, draw_end, texture, tex_x, steps, saved)
+
+
+def column_bands(width, bands):
+    """Split columns 0..width into up to bands contiguous (start, stop) ranges"""
+    bounds = np.linspace(0, width, max(1, min(bands, width)) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds, bounds[1:])]
+
+
+class Scratch:
+    """Reusable per-frame work arrays
+
+    Frame-sized temporaries are several megabytes each; allocating them
+    fresh every frame costs page faults that rival the arithmetic itself.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.arrays = {}
+
+    def get(self, name, shape, dtype):
+        """A C-contiguous array of shape backed by the buffer called name"""
+        array = self.arrays.get(name)
+        if array is None or array.dtype != dtype:
+            array = self.arrays[name] = np.empty(self.size, dtype=dtype)
+        return array[:shape[0] * shape[1]].reshape(shape)
+
+
+class FloorCaster:
+    """Textured floor for the lower half of the view, one NumPy gather per frame
+
+    The distance to the floor seen in each screen row depends only on the
+    row, so it is tabulated once per resolution; a frame then only scales
+    the table by each column's ray direction and samples the texture.
+    """
+
+    def __init__(self, texture, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.horizon = height // 2
+        # Row y sees the floor where a wall's base would be: height / distance = 2 * (y - horizon)
+        rows = np.arange(self.horizon, height)
+        self.row_distance = height / (2.0 * (rows - self.horizon) + 1)
+        # In texels and float32: texel-level precision is plenty and halves the memory traffic
+        self.row_texels = (self.row_distance * TEXTURE_SIZE).astype(np.float32)
+        self.pixels = pygame.surfarray.array3d(texture).astype(np.int64)
+        self.raw = None
+        self.scratch = Scratch(width * (height - self.horizon))
+
+    def raw_pixels(self, surface):
+        """The texture as a flat array of surface's raw pixel values, mapped once"""
+        if self.raw is None:
+            self.raw = map_rgb_array(surface, self.pixels.reshape(-1, 3)).astype(np.uint32)
+        return self.raw
+
+    def cast(self, surface, player_pos, dir_x, dir_y, first_row=None, scratch=None):
+        """Raw floor pixels for every column from first_row to the bottom of the view
+
+        The result lives in a buffer of scratch (by default the caster's own)
+        that the next call with it overwrites.
+        """
+        if first_row is None:
+            first_row = self.horizon
+        if scratch is None:
+            scratch = self.scratch
+        distance = self.row_texels[first_row - self.horizon:]
+        shape = (len(dir_x), len(distance))
+        world = scratch.get('world', shape, np.float32)
+        texel = scratch.get('texel', shape, np.int32)
+        index = scratch.get('index', shape, np.int32)
+
+        # World position of every floor pixel in texels; its low bits pick the texel
+        np.multiply.outer(dir_x.astype(np.float32), distance, out=world)
+        world += np.float32(player_pos[0] * TEXTURE_SIZE)
+        index[...] = world
+        index &= TEXTURE_SIZE - 1
+        index *= TEXTURE_SIZE
+        np.multiply.outer(dir_y.astype(np.float32), distance, out=world)
+        world += np.float32(player_pos[1] * TEXTURE_SIZE)
+        texel[...] = world
+        texel &= TEXTURE_SIZE - 1
+        index |= texel
+        return np.take(self.raw_pixels(surface), index, out=scratch.get('pixels', shape, np.uint32), mode='clip')
+
+
+class VectorRaycaster:
+    """First-person renderer that casts all columns in one NumPy pass
+
+    With workers > 1 the rays are still cast in one pass, then the screen
+    columns are split into bands whose floor and walls are drawn in
+    parallel on a persistent thread pool. Each band writes its own slice
+    of the shared framebuffer with NumPy operations that release the GIL,
+    and the finished frame is blitted once.
+    """
+
+    def __init__(self, sky, atlas, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, profiler=None,
+                 floor_texture=None, workers=1):
+        self.profiler = profiler or FrameProfiler()
+        self.width = width
+        self.height = height
+        self.columns = np.arange(width)
+        self.rows = np.arange(height, dtype=np.int32)
+        self.row_numbers = np.arange(height, dtype=np.float32)
+        self.background = None
+        self.frame = None
+        self.sky = sky
+        self.atlas = atlas
+        self.bands = column_bands(width, workers)
+        # Each band has its own work buffers so bands never share a temporary
+        self.scratch = [Scratch((stop - start) * height) for start, stop in self.bands]
+        self.executor = None
+        if len(self.bands) > 1:
+            # The calling thread draws the first band itself
+            self.executor = ThreadPoolExecutor(max_workers=len(self.bands) - 1, thread_name_prefix='render')
+        self.floor = None
+        if floor_texture is not None:
+            self.floor = FloorCaster(floor_texture, width, height)
+        self.last_hits = None
+
+    def build_background(self, surface):
+        """Rasterize sky and floor once in the target surface's pixel format"""
+        layer = surface.copy()
+        layer.fill((0, 0, 0))
+        sky = self.sky
+        if sky.get_width() != self.width:
+            sky = pygame.transform.scale(sky, (self.width, self.height // 2))
+        layer.blit(sky, (0, 0))
+        pygame.draw.rect(layer, FLOOR_COLOR, (0, self.height // 2, self.width, self.height // 2))
+        self.background = pygame.surfarray.array2d(layer)
+        self.frame = np.empty_like(self.background)
+
+    def render(self, surface, player_pos, player_angle, grid, texture_ids=None, corridors=None):
+        """Render a frame of the 3D view into surface"""
+        if self.background is None:
+            self.build_background(surface)
+
+        dir_x, dir_y = ray_directions(player_angle, self.columns, self.width)
+        hits = cast_rays(grid, player_pos, dir_x, dir_y, self.height, texture_ids, corridors)
+        self.last_hits = hits
+        self.profiler.count('rays', len(dir_x))
+        self.profiler.count('dda_steps', hits.steps)
+        self.profiler.count('dda_saved', hits.saved)
+        self.profiler.mark('rays')
+
+        # Mapped here, before any worker thread needs them
+        self.atlas.raw_pixels(surface)
+        if self.floor is not None:
+            self.floor.raw_pixels(surface)
+
+        if self.executor is None:
+            self.draw_band(surface, player_pos, hits, 0)
+        else:
+            bands = [self.executor.submit(self.draw_band, surface, player_pos, hits, band)
+                     for band in range(1, len(self.bands))]
+            self.draw_band(surface, player_pos, hits, 0)
+            for band in bands:
+                band.result()
+            self.profiler.mark('bands')
+
+        pygame.surfarray.blit_array(surface, self.frame)
+        self.profiler.mark('blit')
+        return hits
+
+    def draw_band(self, surface, player_pos, hits, band):
+        """Draw background, floor and walls for one column band of the frame"""
+        start, stop = self.bands[band]
+        scratch = self.scratch[band]
+        # Only a single band runs on the calling thread, where stage marks are meaningful
+        profile = self.executor is None
+        hits = RayHits._make(value[start:stop] if np.ndim(value) else value for value in hits)
+        frame = self.frame[start:stop]
+        np.copyto(frame, self.background[start:stop])
+
+        if self.floor is not None:
+            # Rows above the lowest wall end are covered by walls in every column
+            first_row = max(self.floor.horizon, int(hits.draw_end.min()))
+            floor = self.floor.cast(surface, player_pos, hits.dir_x, hits.dir_y, first_row, scratch)
+            below = np.greater(self.rows[first_row:], hits.draw_end[:, None],
+                               out=scratch.get('below', floor.shape, np.bool_))
+            np.copyto(frame[:, first_row:], floor, where=below, casting='unsafe')
+            if profile:
+                self.profiler.mark('floor')
+
+        self.draw_walls(surface, frame, hits, scratch)
+        if profile:
+            self.profiler.mark('walls')
+
+    def draw_walls(self, surface, frame, hits, scratch):
+        """Texture every wall strip into frame with one flat gather
+
+        Strips cover draw_start..draw_end inclusive. Each column's texture
+        variant and texel column fix its base index in the atlas; the pixel's
+        offset from the top of the unclipped strip picks the texture row, as
+        in texture_rows.
+        """
+        start = hits.draw_start.astype(np.int32)
+        end = hits.draw_end.astype(np.int32)
+        top, bottom = int(start.min()), int(end.max()) + 1
+        rows = self.rows[top:bottom]
+        shape = (len(start), len(rows))
+        offset = scratch.get('offset', shape, np.float32)
+        index = scratch.get('index', shape, np.int32)
+
+        # Texture row = offset from the strip's unclipped top * (TEXTURE_SIZE / line height),
+        # in float32, so a strip cut off by the screen edge shows only part of the texture;
+        # pixels outside the strip get a valid row too and are masked off below
+        step = (TEXTURE_SIZE / np.maximum(hits.line_height, 1)).astype(np.float32)
+        strip_top = (-hits.line_height // 2 + self.height // 2).astype(np.float32)
+        np.subtract(self.row_numbers[top:bottom], strip_top[:, None], out=offset)
+        offset *= step[:, None]
+        index[...] = offset
+        index &= TEXTURE_SIZE - 1
+
+        fog = self.atlas.fog_level(hits.wall_dist)
+        texel_base = self.atlas.offsets(hits.texture.astype(np.int64), hits.side, fog) + hits.tex_x * TEXTURE_SIZE
+        index += texel_base.astype(np.int32)[:, None]
+        texels = np.take(self.atlas.raw_pixels(surface), index, mode='clip',
+                         out=scratch.get('texels', shape, np.uint32))
+
+        mask = np.greater_equal(rows, start[:, None], out=scratch.get('mask', shape, np.bool_))
+        mask &= np.less_equal(rows, end[:, None], out=scratch.get('inside', shape, np.bool_))
+        np.copyto(frame[:, top:bottom], texels, where=mask, casting='unsafe')
+
+    def close(self):
+        """Stop the band worker threads"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+class ResolutionScaler:
+    """Chooses the internal render scale from measured frame times
+
+    Drops one level when the smoothed frame time stays over target_ms and
+    climbs back when there is clear headroom. min_scale is the quality
+    floor; cooldown frames pass after every change so the new level gets
+    measured before the next decision.
+    """
+
+    LEVELS = (1.0, 0.875, 0.75, 0.625, 0.5, 0.375, 0.25)
+
+    def __init__(self, target_ms=1000 / 60, min_scale=0.5, headroom=0.7, cooldown=30, smoothing=0.1):
+        self.target_ms = target_ms
+        self.levels = [level for level in self.LEVELS if level >= min_scale] or [self.LEVELS[0]]
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.level = 0
+        self.average_ms = None
+        self.wait = cooldown
+
+    @property
+    def scale(self):
+        return self.levels[self.level]
+
+    def update(self, frame_ms):
+        """Feed the work time of the last frame; return the scale to render at"""
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * self.smoothing
+
+        if self.wait:
+            self.wait -= 1
+            return self.scale
+
+        if self.average_ms > self.target_ms and self.level < len(self.levels) - 1:
+            self.change(self.level + 1)
+        elif self.average_ms < self.target_ms * self.headroom and self.level > 0:
+            # Only step up if the larger level is likely to fit: cost grows with pixel count
+            ratio = (self.levels[self.level - 1] / self.scale) ** 2
+            if self.average_ms * ratio < self.target_ms:
+                self.change(self.level - 1)
+        return self.scale
+
+    def change(self, level):
+        self.level = level
+        self.average_ms = None
+        self.wait = self.cooldown
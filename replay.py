@@ -0,0 +1,258 @@
+"""Run recordings: compact per-tick input logs and a headless replayer
+
+A finished run is saved as its maze (seed, algorithm, size and a checksum)
+plus the action bits of every simulation tick and the ticks at which the
+map and hint keys were pressed. Replaying re-runs MazeSimulation on those
+inputs, far faster than real time, to check that the exit was reached and
+that the recorded score follows from the run.
+
+    python replay.py replays/run.mmr                       # verify a recording
+    python replay.py replays/run.mmr --frames 0,600 --out shots  # also render ticks
+"""
+import argparse
+import os
+import struct
+import sys
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from constants import SIM_TICK_RATE
+from maze import generate_maze
+from pathfield import ExitField
+from simulation import START_POS, MazeSimulation, calculate_score
+
+# Header: magic, version, tick rate, difficulty, maze algorithm, seed, maze width/height,
+# maze CRC-32, ticks, elapsed seconds, score, action runs, events; followed by the run
+# actions (uint8) and lengths (uint32), then the event ticks (uint32) and codes (uint8)
+MAGIC = b'MMRP'
+VERSION = 1
+HEADER = struct.Struct('<4sHH16s16sqIIIIddII')
+
+REPLAY_BUFFER_TICKS = SIM_TICK_RATE * 60 * 60  # an hour of play at one byte per tick
+
+# Event codes: presses that change the simulation outside the per-tick actions
+EVENT_MAP = 1
+EVENT_HINTS = 2
+
+Replay = namedtuple('Replay', [
+    'difficulty', 'algorithm', 'seed', 'width', 'height', 'maze_crc', 'tick_rate',
+    'elapsed', 'score', 'actions', 'events'
+])
+ReplayResult = namedtuple('ReplayResult', ['reached_exit', 'ticks', 'sim', 'score'])
+
+
+def maze_checksum(grid):
+    """CRC-32 of a maze's cells, to tell a regenerated maze from a different one"""
+    return zlib.crc32(np.ascontiguousarray(grid, dtype=np.uint8).tobytes())
+
+
+class RunRecorder:
+    """Action bits of every simulation tick of one run, in a fixed-size ring buffer
+
+    record() is a single byte store per tick, with no allocation. A run
+    longer than capacity ticks keeps only its latest ticks and is marked
+    truncated, since it can no longer be replayed from the start.
+    """
+
+    def __init__(self, capacity=REPLAY_BUFFER_TICKS):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.ticks = 0
+        self.events = []
+
+    def record(self, action):
+        """Log the action bits of the tick about to run"""
+        self.buffer[self.ticks % self.capacity] = action
+        self.ticks += 1
+
+    def event(self, code):
+        """Log a map or hint press, applied before the next tick"""
+        self.events.append((self.ticks, code))
+
+    @property
+    def truncated(self):
+        return self.ticks > self.capacity
+
+    def actions(self):
+        """The recorded actions in tick order, oldest first"""
+        actions = np.frombuffer(self.buffer, dtype=np.uint8)
+        if self.ticks <= self.capacity:
+            return actions[:self.ticks].copy()
+        start = self.ticks % self.capacity
+        return np.concatenate([actions[start:], actions[:start]])
+
+    def save(self, path, difficulty, algorithm, seed, grid, elapsed, score):
+        """Write the run to path, run-length encoding the actions"""
+        if self.truncated:
+            raise ValueError(f"run of {self.ticks} ticks overflowed the {self.capacity}-tick buffer")
+        actions = self.actions()
+        # Keys are held for many ticks at a time, so runs of equal actions are long
+        starts = np.flatnonzero(np.diff(actions, prepend=np.int16(-1)))
+        lengths = np.diff(np.append(starts, len(actions))).astype(np.uint32)
+        height, width = np.shape(grid)
+        header = HEADER.pack(MAGIC, VERSION, SIM_TICK_RATE, difficulty.encode('ascii')[:16],
+                             algorithm.encode('ascii')[:16], seed, width, height, maze_checksum(grid),
+                             self.ticks, elapsed, score, len(starts), len(self.events))
+        events = np.array(self.events, dtype=np.int64).reshape(-1, 2)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(actions[starts].tobytes())
+            f.write(lengths.tobytes())
+            f.write(events[:, 0].astype(np.uint32).tobytes())
+            f.write(events[:, 1].astype(np.uint8).tobytes())
+
+
+def load_replay(path):
+    """Read a recording written by RunRecorder.save"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a MemoMaze replay")
+    (magic, version, tick_rate, difficulty, algorithm, seed, width, height, maze_crc, ticks,
+     elapsed, score, runs, events) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a MemoMaze replay")
+    if len(data) < HEADER.size + runs * 5 + events * 5:
+        raise ValueError(f"{path} is truncated")
+
+    offset = HEADER.size
+    run_actions = np.frombuffer(data, dtype=np.uint8, count=runs, offset=offset)
+    offset += runs
+    run_lengths = np.frombuffer(data, dtype=np.uint32, count=runs, offset=offset)
+    offset += runs * 4
+    event_ticks = np.frombuffer(data, dtype=np.uint32, count=events, offset=offset)
+    offset += events * 4
+    event_codes = np.frombuffer(data, dtype=np.uint8, count=events, offset=offset)
+
+    actions = np.repeat(run_actions, run_lengths)
+    if len(actions) != ticks:
+        raise ValueError(f"{path} is corrupt: {len(actions)} actions for {ticks} ticks")
+    return Replay(difficulty.rstrip(b'\0').decode('ascii'), algorithm.rstrip(b'\0').decode('ascii'),
+                  seed, width, height, maze_crc, tick_rate, elapsed, score, actions,
+                  list(zip(event_ticks.tolist(), event_codes.tolist())))
+
+
+def replay_maze(replay, maze=None):
+    """The recorded maze: regenerated from its seed unless given, checked against the CRC"""
+    if maze is None:
+        maze = generate_maze(replay.width, replay.height, replay.seed, replay.algorithm)
+    grid = np.asarray(maze, dtype=np.uint8)
+    if grid.shape != (replay.height, replay.width) or maze_checksum(grid) != replay.maze_crc:
+        raise ValueError("the maze does not match the recording")
+    return grid
+
+
+def replay_run(replay, maze=None, on_tick=None):
+    """Re-simulate a recording headless and return a ReplayResult
+
+    on_tick(tick, sim), if given, is called before every tick, e.g. to
+    render chosen frames.
+    """
+    grid = replay_maze(replay, maze)
+    sim = MazeSimulation(grid, replay.difficulty, ExitField(grid).distance_from(START_POS))
+    events = sorted(replay.events)
+    next_event = 0
+    reached_exit = False
+    for tick, action in enumerate(replay.actions.tolist()):
+        while next_event < len(events) and events[next_event][0] <= tick:
+            apply_event(sim, events[next_event][1])
+            next_event += 1
+        if on_tick is not None:
+            on_tick(tick, sim)
+        if sim.step(action):
+            reached_exit = True
+            break
+    for _, code in events[next_event:]:
+        apply_event(sim, code)
+
+    score = calculate_score(replay.elapsed, sim.top_view_counts, sim.show_minimap, replay.difficulty,
+                            sim.efficiency(), sim.used_hints)
+    return ReplayResult(reached_exit, sim.ticks, sim, score)
+
+
+def apply_event(sim, code):
+    """Replay a recorded key press on sim"""
+    if code == EVENT_MAP:
+        sim.press_map()
+    elif code == EVENT_HINTS:
+        sim.toggle_hints()
+    else:
+        raise ValueError(f"unknown replay event {code}")
+
+
+def verify_replay(replay, maze=None):
+    """Re-simulate a recording; return the problems found (an empty list if it checks out)"""
+    result = replay_run(replay, maze)
+    problems = []
+    if not result.reached_exit:
+        problems.append(f"the run never reaches the exit ({result.ticks} ticks)")
+    elif result.ticks != len(replay.actions):
+        problems.append(f"the exit is reached at tick {result.ticks} of {len(replay.actions)}")
+    # Ticks only run while time passes, so the run can't be shorter than its ticks
+    sim_time = result.ticks / replay.tick_rate
+    if replay.elapsed < sim_time - 1 / replay.tick_rate:
+        problems.append(f"{replay.elapsed:.2f} s recorded for {sim_time:.2f} s of simulated play")
+    if abs(result.score - replay.score) > 0.01:
+        problems.append(f"recorded score {replay.score} but the run scores {result.score}")
+    return problems
+
+
+def render_frames(replay, ticks, out_dir, maze=None):
+    """Replay and save the first-person view at the chosen ticks as PNGs in out_dir"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from main import Game
+
+    grid = replay_maze(replay, maze)
+    game = Game(maze_pool_size=0)
+    os.makedirs(out_dir, exist_ok=True)
+    wanted = set(ticks)
+    saved = []
+
+    def on_tick(tick, sim):
+        if tick in wanted:
+            game.render_frame(sim.player_pos, sim.player_angle, grid)
+            path = os.path.join(out_dir, f'tick{tick:07d}.png')
+            pygame.image.save(game.screen, path)
+            saved.append(path)
+
+    try:
+        replay_run(replay, grid, on_tick)
+    finally:
+        game.close()
+    return saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('replay', help='recording to verify')
+    parser.add_argument('--maze', help='maze file the run was played on (default: regenerate from the seed)')
+    parser.add_argument('--frames', help='comma-separated ticks to render')
+    parser.add_argument('--out', default='replay_frames', help='directory for rendered frames')
+    args = parser.parse_args(argv)
+
+    replay = load_replay(args.replay)
+    maze = None
+    if args.maze:
+        from mazefile import load_maze
+        maze = load_maze(args.maze)
+    print(f"{replay.difficulty} maze {replay.width}x{replay.height} seed {replay.seed}: "
+          f"{len(replay.actions)} ticks, {replay.elapsed:.2f} s, score {replay.score}")
+
+    problems = verify_replay(replay, maze)
+    for problem in problems:
+        print(f"FAILED: {problem}")
+    if not problems:
+        print('Verified: the run reaches the exit and the score matches')
+
+    if args.frames:
+        ticks = [int(tick) for tick in args.frames.split(',')]
+        for path in render_frames(replay, ticks, args.out, maze):
+            print(f"Rendered {path}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
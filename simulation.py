@@ -0,0 +1,165 @@
+import math
+
+from constants import PLAYER_SPEED, ROTATION_SPEED, DIFFICULTY_SETTINGS
+from maze import exit_of
+
+START_POS = (1.5, 1.5)
+START_ANGLE = 0
+
+# Action bits: one per held movement key
+TURN_LEFT = 1
+TURN_RIGHT = 2
+FORWARD = 4
+BACKWARD = 8
+
+
+def keys_to_action(keys):
+    """Pack a {'left', 'right', 'up', 'down'} key-state dict into action bits"""
+    return ((TURN_LEFT if keys['left'] else 0) | (TURN_RIGHT if keys['right'] else 0) |
+            (FORWARD if keys['up'] else 0) | (BACKWARD if keys['down'] else 0))
+
+
+def path_efficiency(optimal_length, cells_walked):
+    """Shortest route length over the cells actually walked, from 0 to 1 (a perfect run)"""
+    if optimal_length is None or optimal_length <= 0 or cells_walked <= 0:
+        return 1.0
+    # Cutting a corner diagonally can beat the cell-by-cell route by a step
+    return min(1.0, optimal_length / cells_walked)
+
+
+def calculate_score(elapsed_time, top_view_counts, show_minimap, difficulty, efficiency=1.0, used_hints=False):
+    """
+    Calculate score based on:
+    - Base score: 1000 points (reduced from 10000)
+    - Time penalty: Points decrease as time increases
+    - Map view penalty: Each map view reduces score
+    - Minimap penalty: Using permanent minimap reduces score
+    - Route penalty: Walking farther than the shortest route reduces score
+    - Hint penalty: Turning on exit hints reduces score
+    - Difficulty multiplier: Higher difficulties give better scores
+    """
+    # Base score
+    base_score = 1000
+
+    # Time penalty
+    time_penalty = elapsed_time * 2  # Lose 2 points per second
+
+    # Map view penalty
+    map_penalty = top_view_counts * 100  # Lose 100 points per map view
+
+    # Minimap penalty
+    minimap_penalty = 200 if show_minimap else 0  # Flat penalty for using permanent minimap
+
+    # Route penalty
+    route_penalty = (1 - efficiency) * 300  # Up to 300 points for wandering (see path_efficiency)
+
+    # Hint penalty
+    hint_penalty = 150 if used_hints else 0  # Flat penalty for using exit hints
+
+    # Calculate raw score
+    raw_score = base_score - time_penalty - map_penalty - minimap_penalty - route_penalty - hint_penalty
+
+    # Apply difficulty multiplier
+    difficulty_multiplier = DIFFICULTY_SETTINGS[difficulty]['score_multiplier']
+    final_score = max(0, raw_score) * difficulty_multiplier
+
+    return round(final_score, 2)
+
+
+class MazeSimulation:
+    """Rendering-free game core: maze, player pose, movement, collision and exit"""
+
+    def __init__(self, maze, difficulty='Easy', optimal_length=None):
+        # Plain row lists index much faster than array rows in the step loop
+        self.rows = maze.tolist() if hasattr(maze, 'tolist') else maze
+        self.height = len(self.rows)
+        self.width = len(self.rows[0])
+        self.exit_cell = exit_of(maze)
+        self.difficulty = difficulty
+        # Shortest route from the entrance in cells (see pathfield.ExitField), for scoring
+        self.optimal_length = optimal_length
+        self.top_view_allowed = DIFFICULTY_SETTINGS[difficulty]['top_view_allowed']
+        self.reset()
+
+    def reset(self):
+        """Put the player back at the entrance and clear map usage"""
+        self.player_pos = list(START_POS)
+        self.player_angle = START_ANGLE
+        self.previous_pos = self.player_pos
+        self.previous_angle = self.player_angle
+        self.top_view_counts = 0
+        self.map_presses = 0
+        self.show_minimap = False
+        self.show_hints = False
+        self.used_hints = False
+        self.cells_walked = 0
+        self.ticks = 0
+
+    def is_open(self, x, y):
+        """True if the point (x, y) lies in a path cell"""
+        cell_x, cell_y = int(x), int(y)
+        return (0 <= cell_y < self.height and 0 <= cell_x < self.width and
+                self.rows[cell_y][cell_x] == 0)
+
+    def step(self, action):
+        """Advance one tick with the given action bits; return True at the exit"""
+        self.previous_pos = self.player_pos
+        self.previous_angle = self.player_angle
+
+        # Update player position and angle
+        if action & TURN_LEFT: self.player_angle -= ROTATION_SPEED
+        if action & TURN_RIGHT: self.player_angle += ROTATION_SPEED
+
+        if action & (FORWARD | BACKWARD):
+            new_pos = list(self.player_pos)
+            if action & FORWARD:
+                new_pos[0] += math.cos(self.player_angle) * PLAYER_SPEED
+                new_pos[1] += math.sin(self.player_angle) * PLAYER_SPEED
+            if action & BACKWARD:
+                new_pos[0] -= math.cos(self.player_angle) * PLAYER_SPEED
+                new_pos[1] -= math.sin(self.player_angle) * PLAYER_SPEED
+
+            # Collision detection
+            if self.is_open(new_pos[0], new_pos[1]):
+                if int(new_pos[0]) != int(self.player_pos[0]) or int(new_pos[1]) != int(self.player_pos[1]):
+                    self.cells_walked += 1
+                self.player_pos = new_pos
+
+        self.ticks += 1
+        return self.at_exit()
+
+    def interpolated_pose(self, alpha):
+        """Pose blended between the previous tick (alpha 0) and the current one (alpha 1)"""
+        pos = [a + (b - a) * alpha for a, b in zip(self.previous_pos, self.player_pos)]
+        angle = self.previous_angle + (self.player_angle - self.previous_angle) * alpha
+        return pos, angle
+
+    def at_exit(self):
+        """True once the player stands in the exit cell"""
+        return (int(self.player_pos[0]) == self.exit_cell[0] and
+                int(self.player_pos[1]) == self.exit_cell[1])
+
+    def press_map(self):
+        """Register an M press; return True if a top view should be shown"""
+        self.map_presses += 1
+        show_view = self.top_view_counts < self.top_view_allowed
+        if show_view:
+            self.top_view_counts += 1
+        if self.map_presses > self.top_view_allowed:
+            # Enable minimap on the third press (after using both map views)
+            self.show_minimap = True
+        return show_view
+
+    def toggle_hints(self):
+        """Register an H press: switch exit hints on or off"""
+        self.show_hints = not self.show_hints
+        self.used_hints = self.used_hints or self.show_hints
+
+    def efficiency(self):
+        """How close the cells walked so far are to the shortest route (see path_efficiency)"""
+        return path_efficiency(self.optimal_length, self.cells_walked)
+
+    def score(self, elapsed_time):
+        """Score for finishing after elapsed_time seconds"""
+        return calculate_score(elapsed_time, self.top_view_counts, self.show_minimap, self.difficulty,
+                               self.efficiency(), self.used_hints)
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pygame
+
+from constants import TEXTURE_SIZE, SIDE_SHADE
+from maze import exit_of
+
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept
+
+# Texture ids stored in the wall texture grid, in TextureAtlas order
+WALL_TEXTURE = 0
+EXIT_TEXTURE = 1
+
+
+@lru_cache(maxsize=1024)
+def texture_rows(line_height, skip=0, count=None):
+    """Return the texture row sampled for each visible pixel of a wall strip line_height tall
+
+    The first skip pixels of the strip are off screen and count pixels are
+    shown (default: the rest of the strip). The step is perspective-correct:
+    a strip cut off by the screen edge shows only part of the texture.
+    """
+    if count is None:
+        count = line_height - skip
+    # float32 pixel * step, the same arithmetic VectorRaycaster.draw_walls does per pixel
+    step = np.float32(TEXTURE_SIZE / max(line_height, 1))
+    pixels = np.arange(count, dtype=np.float32) + np.float32(skip)
+    rows = (pixels * step).astype(np.int32) & (TEXTURE_SIZE - 1)
+    rows.flags.writeable = False  # shared between callers through the cache
+    return rows
+
+
+def map_rgb_array(surface, rgb):
+    """Map an (n, 3) array of colours to surface's raw pixel values"""
+    masks = surface.get_masks()
+    shifts = surface.get_shifts()
+    losses = surface.get_losses()
+    pixels = np.zeros(rgb.shape[0], dtype=np.int64)
+    for channel in range(3):
+        value = (rgb[:, channel] >> losses[channel]) << shifts[channel]
+        pixels |= value & masks[channel]
+    if masks[3]:
+        pixels |= masks[3]
+    return pixels
+
+
+def wall_texture_ids(grid):
+    """Texture id of every wall face, indexed [side, y, x] by the cell a ray hits
+
+    Computed once per maze so a hit needs a single lookup. Only the faces
+    that lead into the exit cell show the exit texture.
+    """
+    height, width = grid.shape
+    ids = np.full((2, height, width), WALL_TEXTURE, dtype=np.uint8)
+    exit_x, exit_y = exit_of(grid)
+    ids[0, exit_y, [exit_x - 1, exit_x + 1]] = EXIT_TEXTURE
+    ids[1, [exit_y - 1, exit_y + 1], exit_x] = EXIT_TEXTURE
+    return ids
+
+
+class TextureAtlas:
+    """Every wall texture, pre-shaded for side 1 and for each distance-fog level
+
+    pixels[texture, side, fog, x, y] is an RGB texel. With fog_levels > 1,
+    walls fade towards fog_color in equal steps out to fog_distance cells.
+    """
+
+    def __init__(self, textures, fog_levels=1, fog_color=(0, 0, 0), fog_distance=1.0):
+        self.fog_levels = fog_levels
+        self.fog_distance = fog_distance
+        base = np.stack([pygame.surfarray.array3d(texture) for texture in textures]).astype(np.float64)
+        fog = np.array(fog_color, dtype=np.float64)
+
+        shades = []
+        for shade in (1.0, SIDE_SHADE):
+            # Truncate like the shading cast_ray used to do per pixel
+            shaded = (base * shade).astype(np.int64)
+            levels = [shaded + ((fog - shaded) * (level / fog_levels)).astype(np.int64)
+                      for level in range(fog_levels)]
+            shades.append(np.stack(levels, axis=1))
+        self.pixels = np.stack(shades, axis=1)
+        self.raw = None
+
+    def fog_level(self, wall_dist):
+        """Fog level for a hit distance (scalar or array)"""
+        if isinstance(wall_dist, float):
+            # cast_ray's per-column path, kept free of NumPy calls
+            if self.fog_levels == 1:
+                return 0
+            return min(int(wall_dist * self.fog_levels / self.fog_distance), self.fog_levels - 1)
+        if self.fog_levels == 1:
+            return 0 if np.ndim(wall_dist) == 0 else np.zeros(len(wall_dist), dtype=np.int64)
+        level = wall_dist * self.fog_levels / self.fog_distance
+        if np.ndim(wall_dist) == 0:
+            return min(int(level), self.fog_levels - 1)
+        return np.minimum(level.astype(np.int64), self.fog_levels - 1)
+
+    def offsets(self, texture, side, fog):
+        """Flat index of texel (0, 0) of the given variants in raw_pixels"""
+        return ((texture * 2 + side) * self.fog_levels + fog) * TEXTURE_SIZE * TEXTURE_SIZE
+
+    def raw_pixels(self, surface):
+        """All texels as one flat array of surface's raw pixel values, mapped once"""
+        if self.raw is None:
+            self.raw = map_rgb_array(surface, self.pixels.reshape(-1, 3)).astype(np.uint32)
+        return self.raw
+
+    def raw_columns(self, surface):
+        """raw_pixels viewed as [texture, side, fog, x] columns of TEXTURE_SIZE texels"""
+        return self.raw_pixels(surface).reshape(self.pixels.shape[:-1])
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (text, size, colour)"""
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, font, size, text, color):
+        """Return text rendered with font; size names the font in the key"""
+        key = (text, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
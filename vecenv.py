@@ -0,0 +1,100 @@
+import numpy as np
+
+from constants import PLAYER_SPEED, ROTATION_SPEED, FOV, DIFFICULTY_SETTINGS
+from maze import generate_maze
+from raycaster import march_rays
+from simulation import START_POS, START_ANGLE, TURN_LEFT, TURN_RIGHT, FORWARD, BACKWARD
+
+
+class VectorMazeEnv:
+    """N mazes and player poses stepped together as NumPy arrays
+
+    Mazes of every size are padded with walls into one (N, size, size)
+    array, so movement, collision and exit checks are plain array
+    operations. Actions use the key bits from simulation.py.
+    """
+
+    def __init__(self, num_envs, difficulties=None, seed=0, algorithm='dfs', depth_rays=0):
+        difficulties = difficulties or [difficulty for difficulty, settings in DIFFICULTY_SETTINGS.items()
+                                        if not settings.get('endless')]
+        self.num_envs = num_envs
+        self.difficulties = [difficulties[i % len(difficulties)] for i in range(num_envs)]
+        self.sizes = np.array([DIFFICULTY_SETTINGS[d]['maze_size'] for d in self.difficulties])
+        self.seeds = seed + np.arange(num_envs)
+        self.depth_rays = depth_rays
+
+        size = int(self.sizes.max())
+        self.grids = np.ones((num_envs, size, size), dtype=np.uint8)
+        for i, (maze_size, maze_seed) in enumerate(zip(self.sizes.tolist(), self.seeds.tolist())):
+            self.grids[i, :maze_size, :maze_size] = generate_maze(maze_size, maze_size, maze_seed, algorithm)
+        self.exit_x = self.sizes - 2
+        self.exit_y = self.sizes - 2
+
+        self.pos = np.zeros((num_envs, 2))
+        self.angle = np.zeros(num_envs)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Move the selected envs (default all) back to the entrance"""
+        mask = slice(None) if mask is None else mask
+        self.pos[mask] = START_POS
+        self.angle[mask] = START_ANGLE
+        self.done[mask] = False
+        self.ticks[mask] = 0
+        return self.observe()
+
+    def step(self, actions):
+        """Apply one action per env; finished envs stay frozen until reset
+
+        Returns (observations, done) where observations are the depth
+        readings from observe() or None when depth_rays is 0.
+        """
+        actions = np.asarray(actions)
+        live = ~self.done
+        turn = ((actions & TURN_RIGHT) != 0).astype(np.int64) - ((actions & TURN_LEFT) != 0)
+        self.angle += np.where(live, turn * ROTATION_SPEED, 0.0)
+
+        move = ((actions & FORWARD) != 0).astype(np.int64) - ((actions & BACKWARD) != 0)
+        moving = live & (move != 0)
+        new_x = self.pos[:, 0] + np.cos(self.angle) * PLAYER_SPEED * move
+        new_y = self.pos[:, 1] + np.sin(self.angle) * PLAYER_SPEED * move
+
+        # Collision detection: only step into open cells inside each maze
+        cell_x = new_x.astype(np.int64)
+        cell_y = new_y.astype(np.int64)
+        inside = (cell_x >= 0) & (cell_x < self.sizes) & (cell_y >= 0) & (cell_y < self.sizes)
+        env = np.arange(self.num_envs)
+        open_cell = np.zeros(self.num_envs, dtype=bool)
+        open_cell[inside] = self.grids[env[inside], cell_y[inside], cell_x[inside]] == 0
+        accept = moving & open_cell
+        self.pos[accept, 0] = new_x[accept]
+        self.pos[accept, 1] = new_y[accept]
+
+        self.ticks += live
+        self.done |= ((self.pos[:, 0].astype(np.int64) == self.exit_x) &
+                      (self.pos[:, 1].astype(np.int64) == self.exit_y))
+        return self.observe(), self.done.copy()
+
+    def observe(self):
+        """Perpendicular wall distance for depth_rays rays per env, shape (N, depth_rays)"""
+        if not self.depth_rays:
+            return None
+
+        # One DDA over every ray of every env, as cast_rays does for one view
+        rays = self.depth_rays
+        env = np.repeat(np.arange(self.num_envs), rays)
+        angles = ((self.angle - FOV / 2)[:, None] + (np.arange(rays) / rays) * FOV).ravel()
+        sizes = self.sizes[env]
+
+        def is_wall(active, mx, my):
+            hit = (mx < 0) | (mx >= sizes[active]) | (my < 0) | (my >= sizes[active])
+            inside = ~hit
+            hit[inside] = self.grids[env[active][inside], my[inside], mx[inside]] == 1
+            return hit
+
+        px = self.pos[env, 0]
+        py = self.pos[env, 1]
+        wall_dist = march_rays(is_wall, px, py, np.cos(angles), np.sin(angles))[3]
+        return wall_dist.reshape(self.num_envs, rays)